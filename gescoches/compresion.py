@@ -0,0 +1,59 @@
+"""
+Compresión gzip de las respuestas HTML.
+
+El GZipMiddleware de Django comprime las respuestas en streaming con un
+único GzipFile sin vaciarlo entre partes: zlib retiene la salida hasta
+juntar varias decenas de KB, y el navegador no recibe la cabecera de la
+página ni las primeras filas hasta entonces. Aquí cada parte del
+StreamingHttpResponse se vacía con Z_SYNC_FLUSH (GzipFile.flush()) en
+cuanto se comprime, a cambio de unos pocos bytes por parte. El resto de
+respuestas se comprimen igual que con el middleware de Django.
+
+BREACH: las páginas llevan el token CSRF enmascarado (distinto en cada
+respuesta) y el middleware añade bytes aleatorios al nombre del fichero
+gzip, como el de Django.
+"""
+import secrets
+from gzip import GzipFile
+
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+from django.utils.text import StreamingBuffer
+
+
+def comprimir_por_partes(partes, max_random_bytes=None):
+    """gzip de un iterable de bytes, con un Z_SYNC_FLUSH después de cada parte"""
+    buffer = StreamingBuffer()
+    nombre = get_random_string(secrets.randbelow(max_random_bytes) + 1).encode() if max_random_bytes else None
+    with GzipFile(filename=nombre, mode='wb', compresslevel=6, fileobj=buffer, mtime=0) as fichero:
+        yield buffer.read()
+        for parte in partes:
+            if not parte:
+                continue
+            fichero.write(parte)
+            fichero.flush()
+            yield buffer.read()
+    yield buffer.read()
+
+
+class GZipPorBloquesMiddleware(GZipMiddleware):
+    """GZipMiddleware que envía cada parte de un StreamingHttpResponse según se comprime"""
+
+    def process_response(self, request, response):
+        if not response.streaming or response.is_async or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+
+        response.streaming_content = comprimir_por_partes(
+            response.streaming_content, max_random_bytes=self.max_random_bytes
+        )
+        del response.headers['Content-Length']
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
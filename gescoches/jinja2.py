@@ -0,0 +1,60 @@
+"""
+Entorno Jinja2 para el motor de plantillas opcional (MOTOR_PLANTILLAS=jinja2).
+
+Las plantillas están en jinja2/ con los mismos nombres que en templates/.
+Los badges de estado y las fechas, que en las plantillas de Django son
+cadenas de {% if %} y filtros |date por fila, aquí son funciones Python
+compartidas por todas las plantillas.
+"""
+from datetime import datetime
+
+from django.contrib.messages import get_messages
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import timezone
+from jinja2 import Environment
+from markupsafe import Markup, escape
+
+from vehiculos.templatetags.estaticos import css_critico
+
+# estado -> (clase css, icono, etiqueta corta)
+BADGES_ESTADO = {
+    'DISPONIBLE': ('badge-disponible', '✅', 'Disponible'),
+    'EN_USO': ('badge-en-uso', '🔑', 'En Uso'),
+    'BAJA': ('badge-baja', '❌', 'Baja'),
+}
+
+
+def badge_estado(estado, etiqueta=None):
+    """<span> del estado de un vehículo; `etiqueta` sustituye a la etiqueta corta"""
+    badge = BADGES_ESTADO.get(estado)
+    if badge is None:
+        return ''
+    clase, icono, corta = badge
+    return Markup(f'<span class="badge {clase}">{icono} {escape(etiqueta or corta)}</span>')
+
+
+def fecha(valor, formato='%d/%m/%Y'):
+    """Equivalente a |date de Django (hora local) con formato strftime"""
+    if not valor:
+        return ''
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        valor = timezone.localtime(valor)
+    return valor.strftime(formato)
+
+
+def url(nombre, *args):
+    return reverse(nombre, args=args)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'get_messages': get_messages,
+        'css_critico': css_critico,
+        'badge_estado': badge_estado,
+    })
+    env.filters['fecha'] = fecha
+    return env
@@ -0,0 +1,98 @@
+"""
+Backend PostgreSQL con pool de conexiones por proceso.
+
+Con CONN_MAX_AGE cada hilo de cada worker mantiene su propia conexión
+abierta aunque no la use. Este backend, en cambio, toma la conexión de un
+pool acotado y compartido por todos los hilos del proceso
+(gescoches/postgresql/pool.py) y la devuelve al terminar cada petición,
+cuando Django la "cierra". Con WEB_CONCURRENCY workers el servidor ve como
+mucho WEB_CONCURRENCY * max_size conexiones.
+
+Opciones en OPTIONS['pool'] (mismos nombres que el pool nativo de Django 5.1
+con psycopg 3):
+    min_size   conexiones que se mantienen abiertas aunque estén libres (1)
+    max_size   máximo de conexiones abiertas por proceso (10)
+    timeout    segundos que se espera una conexión libre (10)
+    max_idle   segundos que una conexión de sobra puede estar libre (600)
+    check_idle (propia) segundos libre a partir de los que una conexión se
+               comprueba con SELECT 1 antes de prestarla (30)
+
+Una conexión libre cerrada o que no responde al SELECT 1 se sustituye por
+una nueva al adquirirla: tras un reinicio o un failover del servidor la
+primera petición no falla. Por eso no hacen falta CONN_HEALTH_CHECKS.
+
+CONN_MAX_AGE debe ser 0 para que la conexión vuelva al pool en cada petición.
+
+Uso en settings.py:
+    DATABASES = {'default': {'ENGINE': 'gescoches.postgresql', ...,
+                             'OPTIONS': {'pool': {'max_size': 5}}}}
+Estadísticas: gescoches.postgresql.pool.estadisticas_pools()
+"""
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .pool import cerrar_pools, obtener_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # No se puede borrar una base de datos con conexiones abiertas en el pool
+        cerrar_pools(self.connection.clave_pool(test_database_name))
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.opciones_pool = params.pop('pool', {})
+        return params
+
+    def clave_pool(self, dbname):
+        return f"{self.alias}:{dbname}@{self.settings_dict['HOST']}:{self.settings_dict['PORT']}"
+
+    def get_new_connection(self, conn_params):
+        pool = obtener_pool(self.clave_pool(conn_params.get('dbname')), **self.opciones_pool)
+        conexion = pool.adquirir(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            validar=lambda conexion, segundos_libre: self._conexion_valida(conexion, segundos_libre, pool.check_idle),
+        )
+        self._pool = pool
+        # get_new_connection() fija el nivel de aislamiento del wrapper; al reutilizar también
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return conexion
+
+    def _conexion_valida(self, conexion, segundos_libre, check_idle):
+        if conexion.closed:
+            return False
+        if segundos_libre < check_idle:
+            return True
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            # Sin la transacción implícita del SELECT si la conexión no está en autocommit
+            if not conexion.autocommit:
+                conexion.rollback()
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Dentro de un atomic Django conserva la referencia: no se puede prestar a otro hilo.
+        # Con errors_occurred, close_if_unusable_or_obsolete() ya la ha visto inservible.
+        descartar = self.in_atomic_block or self.errors_occurred or bool(self.connection.closed)
+        if not descartar:
+            try:
+                # Vuelve limpia al pool: sin transacción abierta ni errores pendientes
+                if not self.get_autocommit():
+                    self.connection.rollback()
+                    self.connection.autocommit = True
+            except self.Database.Error:
+                descartar = True
+        self._pool.devolver(self.connection, descartar=descartar)
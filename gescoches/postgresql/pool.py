@@ -0,0 +1,196 @@
+"""
+Pool de conexiones acotado y compartido por todos los hilos de un proceso.
+
+No depende del driver: recibe en adquirir() la función que abre una conexión
+nueva. Lo usa el backend gescoches.postgresql (ver base.py).
+
+- Como mucho `max_size` conexiones abiertas por proceso y base de datos. Si
+  están todas en uso, adquirir() espera hasta `timeout` segundos a que se
+  devuelva una y, si no, lanza PoolAgotado.
+- Las conexiones libres por encima de `min_size` que llevan más de
+  `max_idle` segundos sin usarse se cierran.
+- adquirir() puede recibir una función que valida la conexión libre antes
+  de prestarla (el backend hace SELECT 1 si lleva más de `check_idle`
+  segundos libre). Si no la pasa (servidor reiniciado, failover, timeout de
+  un proxy) se cierra y se abre otra nueva en su lugar, sin que la petición
+  vea el error.
+- Cada pool lleva sus estadísticas (en uso, esperas, tiempo de espera...),
+  disponibles con estadisticas_pools().
+
+Los pools son por proceso: un worker de gunicorn creado con fork no reutiliza
+las conexiones del master (el master las cierra con cerrar_pools()).
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+
+class PoolAgotado(OperationalError):
+    """No se ha conseguido una conexión libre en `timeout` segundos"""
+
+
+class PoolConexiones:
+
+    def __init__(self, nombre, min_size=1, max_size=10, timeout=10, max_idle=600, check_idle=30):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('El pool necesita 0 <= min_size <= max_size y max_size >= 1')
+        self.nombre = nombre
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_idle = check_idle
+        self._condicion = threading.Condition()
+        # (conexion, momento en que quedó libre); se reutiliza la más reciente
+        self._libres = deque()
+        self._abiertas = 0
+        self._en_uso = 0
+        self._adquisiciones = 0
+        self._esperas = 0
+        self._timeouts = 0
+        self._descartadas = 0
+        self._tiempo_espera = 0.0
+        self._espera_maxima = 0.0
+
+    def adquirir(self, crear, validar=None):
+        """
+        Devuelve una conexión libre o una nueva creada con `crear()`.
+        Con `validar(conexion, segundos_libre)`, una conexión libre que no la
+        pasa se cierra y se sustituye por una nueva.
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        with self._condicion:
+            espero = False
+            while not self._libres and self._abiertas >= self.max_size:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._timeouts += 1
+                    raise PoolAgotado(
+                        f'Pool {self.nombre}: sin conexiones libres tras {self.timeout} s '
+                        f'({self.max_size} en uso)'
+                    )
+                espero = True
+                self._condicion.wait(restante)
+            if espero:
+                espera = time.monotonic() - inicio
+                self._esperas += 1
+                self._tiempo_espera += espera
+                self._espera_maxima = max(self._espera_maxima, espera)
+
+            conexion, libre_desde = self._libres.pop() if self._libres else (None, None)
+            if conexion is None:
+                # Se reserva el hueco antes de conectar, fuera del lock
+                self._abiertas += 1
+            self._en_uso += 1
+            self._adquisiciones += 1
+
+        if conexion is not None and validar is not None and not validar(conexion, time.monotonic() - libre_desde):
+            # La nueva ocupa el hueco de la inservible
+            _cerrar(conexion)
+            conexion = None
+            with self._condicion:
+                self._descartadas += 1
+
+        if conexion is None:
+            try:
+                conexion = crear()
+            except BaseException:
+                with self._condicion:
+                    self._abiertas -= 1
+                    self._en_uso -= 1
+                    self._condicion.notify()
+                raise
+        return conexion
+
+    def devolver(self, conexion, descartar=False):
+        """Devuelve la conexión al pool, o la cierra si `descartar`"""
+        cerrar = [conexion] if descartar else []
+        ahora = time.monotonic()
+        with self._condicion:
+            self._en_uso -= 1
+            if descartar:
+                self._abiertas -= 1
+            else:
+                self._libres.append((conexion, ahora))
+            # Libres de sobra que llevan demasiado sin usarse (las más antiguas primero)
+            while (
+                self._libres
+                and self._abiertas > self.min_size
+                and ahora - self._libres[0][1] > self.max_idle
+            ):
+                cerrar.append(self._libres.popleft()[0])
+                self._abiertas -= 1
+            self._condicion.notify()
+        for sobrante in cerrar:
+            _cerrar(sobrante)
+
+    def cerrar(self):
+        """Cierra las conexiones libres (las que están en uso se cierran al devolverlas)"""
+        with self._condicion:
+            libres = [conexion for conexion, _ in self._libres]
+            self._libres.clear()
+            self._abiertas -= len(libres)
+        for conexion in libres:
+            _cerrar(conexion)
+
+    def estadisticas(self):
+        with self._condicion:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'abiertas': self._abiertas,
+                'en_uso': self._en_uso,
+                'libres': len(self._libres),
+                'adquisiciones': self._adquisiciones,
+                'esperas': self._esperas,
+                'timeouts': self._timeouts,
+                'descartadas': self._descartadas,
+                'tiempo_espera_ms': round(self._tiempo_espera * 1000, 1),
+                'espera_maxima_ms': round(self._espera_maxima * 1000, 1),
+            }
+
+
+def _cerrar(conexion):
+    try:
+        conexion.close()
+    except Exception:
+        pass
+
+
+# (pid, clave) -> PoolConexiones
+_pools = {}
+_lock = threading.Lock()
+
+
+def obtener_pool(clave, **opciones):
+    """Pool de este proceso para `clave` (alias y destino de la conexión)"""
+    clave_proceso = (os.getpid(), clave)
+    pool = _pools.get(clave_proceso)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(clave_proceso)
+            if pool is None:
+                pool = _pools[clave_proceso] = PoolConexiones(clave, **opciones)
+    return pool
+
+
+def estadisticas_pools():
+    """{clave: estadísticas} de los pools de este proceso"""
+    pid = os.getpid()
+    return {
+        clave: pool.estadisticas()
+        for (pid_pool, clave), pool in list(_pools.items())
+        if pid_pool == pid
+    }
+
+
+def cerrar_pools(clave=None):
+    """Cierra las conexiones libres de los pools de este proceso (o solo `clave`)"""
+    pid = os.getpid()
+    for (pid_pool, clave_pool), pool in list(_pools.items()):
+        if pid_pool == pid and (clave is None or clave_pool == clave):
+            pool.cerrar()
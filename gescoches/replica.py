@@ -0,0 +1,86 @@
+"""
+Lecturas en réplica para las vistas de solo lectura.
+
+Se activa definiendo DATABASE_REPLICA_URL (ver settings.py). Entonces:
+
+- Las vistas decoradas con @lectura_replica leen de la base de datos 'replica'.
+- Todas las escrituras van siempre a 'default' (primaria).
+- Read-your-writes: en cuanto una petición escribe, el resto de sus lecturas
+  van a la primaria, y el navegador recibe una cookie que mantiene sus
+  lecturas en la primaria durante DATABASE_REPLICA_STICKY segundos, para
+  no ver datos antiguos por el retraso de replicación.
+
+Sin réplica configurada el decorador no hace nada.
+"""
+import threading
+from functools import wraps
+
+from django.conf import settings
+
+ALIAS_REPLICA = 'replica'
+COOKIE_PRIMARIA = 'gescoches_primaria'
+
+_estado = threading.local()
+
+
+def _hay_replica():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def lectura_replica(view_func):
+    """Marca una vista de solo lectura para que sus consultas vayan a la réplica"""
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not _hay_replica() or COOKIE_PRIMARIA in request.COOKIES:
+            return view_func(request, *args, **kwargs)
+        _estado.usar_replica = True
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _estado.usar_replica = False
+    return _wrapped
+
+
+class ReplicaRouter:
+    """Router: lecturas marcadas a la réplica, escrituras a la primaria"""
+
+    def db_for_read(self, model, **hints):
+        if getattr(_estado, 'usar_replica', False) and not getattr(_estado, 'escrito', False):
+            return ALIAS_REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _estado.escrito = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y primaria contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Reinicia el estado del router en cada petición y, si la petición ha
+    escrito (o no es GET/HEAD), fija la cookie de lecturas en primaria.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _estado.escrito = False
+        _estado.usar_replica = False
+        response = self.get_response(request)
+        if _estado.escrito or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                COOKIE_PRIMARIA,
+                '1',
+                max_age=settings.DATABASE_REPLICA_STICKY,
+                httponly=True,
+                samesite='Lax',
+            )
+        _estado.escrito = False
+        return response
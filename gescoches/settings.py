@@ -47,10 +47,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # gzip de las páginas (los estáticos ya los sirve comprimidos WhiteNoise); ver gescoches/compresion.py
+    'gescoches.compresion.GZipPorBloquesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'vehiculos.middleware.HistorialEstadosMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -73,6 +76,28 @@ TEMPLATES = [
     },
 ]
 
+# Motor opcional para los listados grandes (dashboard, vehículos, asignaciones):
+# MOTOR_PLANTILLAS=jinja2 usa las plantillas de jinja2/ (ver gescoches/jinja2.py).
+# Comparar con: python manage.py benchmark_plantillas
+MOTOR_PLANTILLAS = config('MOTOR_PLANTILLAS', default='django')
+
+# Listados de vehículos y asignaciones enviados por bloques (vehiculos/streaming.py)
+# en lugar de renderizar el HTML entero antes de responder.
+# Comparar con: python manage.py medir_streaming
+LISTADOS_STREAMING = config('LISTADOS_STREAMING', default=True, cast=bool)
+
+JINJA2_TEMPLATES = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'DIRS': [BASE_DIR / 'jinja2'],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'environment': 'gescoches.jinja2.environment',
+    },
+}
+
+if MOTOR_PLANTILLAS == 'jinja2':
+    TEMPLATES.append(JINJA2_TEMPLATES)
+
 WSGI_APPLICATION = 'gescoches.wsgi.application'
 
 
@@ -82,22 +107,115 @@ WSGI_APPLICATION = 'gescoches.wsgi.application'
 # Prefer DATABASE_URL if present (Render/Aiven). Fallback to SQLite for local dev.
 DATABASE_URL = config('DATABASE_URL', default='')
 
+# DATABASE_POOL=True cambia las conexiones persistentes por hilo (CONN_MAX_AGE) por un
+# pool acotado y compartido por los hilos de cada proceso (ver gescoches/postgresql).
+# Máximo de conexiones en el servidor: WEB_CONCURRENCY * DATABASE_POOL_MAX.
+# Comparar con: python manage.py benchmark_pool --url postgresql://...
+DATABASE_POOL = config('DATABASE_POOL', default=False, cast=bool)
+DATABASE_POOL_OPCIONES = {
+    'min_size': config('DATABASE_POOL_MIN', default=1, cast=int),
+    'max_size': config('DATABASE_POOL_MAX', default=5, cast=int),
+    # Segundos esperando una conexión libre antes de dar error
+    'timeout': config('DATABASE_POOL_TIMEOUT', default=10, cast=float),
+    # Segundos libre a partir de los que una conexión se comprueba (SELECT 1) antes de usarla
+    'check_idle': config('DATABASE_POOL_CHECK_IDLE', default=30, cast=float),
+}
+
+
+def _configurar_pool(base_de_datos):
+    if DATABASE_POOL and base_de_datos['ENGINE'] == 'django.db.backends.postgresql':
+        base_de_datos['ENGINE'] = 'gescoches.postgresql'
+        # La conexión vuelve al pool al final de cada petición
+        base_de_datos['CONN_MAX_AGE'] = 0
+        # Las conexiones inservibles las descarta el pool al adquirirlas (check_idle)
+        base_de_datos['CONN_HEALTH_CHECKS'] = False
+        base_de_datos.setdefault('OPTIONS', {})['pool'] = DATABASE_POOL_OPCIONES
+    return base_de_datos
+
+
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.config(
+        'default': _configurar_pool(dj_database_url.config(
             default=DATABASE_URL,
             conn_max_age=600,
             conn_health_checks=True,
-        )
+        ))
     }
 else:
+    # SQLITE_OPTIMIZADO (por defecto) usa gescoches/sqlite: WAL, PRAGMAs ajustados y
+    # BEGIN IMMEDIATE, apto para varios workers de gunicorn en un solo nodo.
+    # Comparar con: python manage.py benchmark_sqlite
+    SQLITE_OPTIMIZADO = config('SQLITE_OPTIMIZADO', default=True, cast=bool)
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'gescoches.sqlite' if SQLITE_OPTIMIZADO else 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 600 if SQLITE_OPTIMIZADO else 0,
         }
     }
 
+# Réplica de solo lectura opcional para listados e informes (ver gescoches/replica.py).
+# En local se puede probar con dos ficheros SQLite:
+#   DATABASE_REPLICA_URL=sqlite:///db_replica.sqlite3
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+# Segundos que un usuario lee de la primaria tras escribir (read-your-writes)
+DATABASE_REPLICA_STICKY = config('DATABASE_REPLICA_STICKY', default=10, cast=int)
+
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = _configurar_pool(dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    ))
+    # En los tests la réplica es la misma base de datos que la primaria
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['gescoches.replica.ReplicaRouter']
+    MIDDLEWARE.append('gescoches.replica.ReplicaMiddleware')
+
+
+# Caché
+# CACHE_BACKEND=locmem (por defecto, por proceso), file (compartida entre workers
+# del mismo nodo, en CACHE_LOCATION) o la ruta de cualquier backend de Django para
+# una caché compartida, p.ej. django.core.cache.backends.redis.RedisCache con
+# CACHE_LOCATION=redis://host:6379/0
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gescoches',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': config('CACHE_LOCATION', default=''),
+        }
+    }
+
+# Sesiones y usuario desde la caché. Consultas ahorradas por petición autenticada
+# con la caché caliente: 1 (SELECT de django_session) + 1 (SELECT de auth_user).
+# Las sesiones se siguen escribiendo en BD, así que sobreviven a un reinicio.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = [
+    'vehiculos.autenticacion.CachedModelBackend',
+    # Mantiene válidas las sesiones iniciadas antes de usar el backend con caché
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Segundos que se reutiliza el usuario cacheado. Con locmem cada worker tiene su
+# copia: un cambio hecho en otro worker se ve como mucho tras este tiempo.
+AUTH_USUARIO_CACHE_TTL = config('AUTH_USUARIO_CACHE_TTL', default=60, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -138,7 +256,14 @@ STATICFILES_DIRS = [BASE_DIR / 'static'] if os.path.exists(BASE_DIR / 'static')
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Whitenoise configuración
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise + generación de css/styles.critico.css en collectstatic (ver gescoches/storage.py).
+# Los ficheros con hash se sirven con Cache-Control immutable y, si está instalado
+# Brotli, con variantes .br además de .gz.
+STATICFILES_STORAGE = 'gescoches.storage.GesCochesStaticStorage'
+# Max-age de los ficheros sin hash (los que tienen hash usan 10 años + immutable)
+WHITENOISE_MAX_AGE = 3600
+# Incrustar el CSS crítico en el dashboard y los listados ({% css_critico %})
+CSS_CRITICO_INLINE = config('CSS_CRITICO_INLINE', default=True, cast=bool)
 
 # CSRF y seguridad para Render
 CSRF_TRUSTED_ORIGINS = config('CSRF_TRUSTED_ORIGINS', default='http://localhost:8000').split(',')
@@ -148,6 +273,12 @@ CSRF_TRUSTED_ORIGINS = config('CSRF_TRUSTED_ORIGINS', default='http://localhost:
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Tareas periódicas (python manage.py ejecutar_tareas, ver vehiculos/tareas.py)
+TAREAS_LIMPIEZA_SEMANAS = config('TAREAS_LIMPIEZA_SEMANAS', default=3, cast=int)
+
+# Hilos del informe por taller (vehiculos/informes.py): un taller por hilo
+INFORMES_HILOS = config('INFORMES_HILOS', default=4, cast=int)
+
 # Login settings
 LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/vehiculos/'
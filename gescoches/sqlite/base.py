@@ -0,0 +1,48 @@
+"""
+Backend SQLite para despliegues de un solo nodo.
+
+Igual que django.db.backends.sqlite3 pero:
+
+- Al abrir cada conexión aplica los PRAGMA de PRAGMAS_POR_DEFECTO (WAL,
+  synchronous, mmap_size, cache_size, busy_timeout...). Se pueden cambiar
+  con la clave 'pragmas' de OPTIONS.
+- Las transacciones (bloques atomic) empiezan con BEGIN IMMEDIATE: el
+  bloqueo de escritura se pide al principio y, si está ocupado, se espera
+  busy_timeout. Con BEGIN normal, dos transacciones que leen y luego
+  escriben fallan con "database is locked" sin esperar.
+
+Uso en settings.py:
+    DATABASES = {'default': {'ENGINE': 'gescoches.sqlite', 'NAME': ...}}
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS_POR_DEFECTO = {
+    # Lectores y escritor no se bloquean entre sí
+    'journal_mode': 'WAL',
+    # Con WAL, NORMAL es seguro frente a caídas de la aplicación
+    'synchronous': 'NORMAL',
+    # Milisegundos que se espera un bloqueo antes de dar "database is locked"
+    'busy_timeout': 5000,
+    # Negativo = KiB: 64 MB de caché de páginas por conexión
+    'cache_size': -64000,
+    # Lecturas mapeadas en memoria (256 MB)
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS_POR_DEFECTO, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for nombre, valor in self.pragmas.items():
+            conn.execute(f'PRAGMA {nombre} = {valor}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,90 @@
+"""
+Almacenamiento de estáticos con paso de CSS crítico.
+
+GesCochesStaticStorage es el CompressedManifestStaticFilesStorage de
+WhiteNoise (nombres con hash, variantes .gz y .br si está instalado
+Brotli, cabeceras immutable para los ficheros con hash) con un paso
+previo en collectstatic: genera css/styles.critico.css con las reglas de
+styles.css necesarias para pintar la parte superior del dashboard y de
+los listados. Ese CSS se incrusta en el HTML con {% css_critico %} y la
+hoja completa se carga sin bloquear el render.
+"""
+import re
+
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+CSS_ORIGEN = 'css/styles.css'
+CSS_CRITICO = 'css/styles.critico.css'
+
+# Selectores que se ven sin hacer scroll en el dashboard y los listados
+SELECTORES_CRITICOS = (
+    ':root', '*', 'body',
+    '.navbar', '.nav-', '.container', '.messages', '.alert',
+    '.dashboard', '.stats-grid', '.stat-', '.section',
+    '.page-header', '.filters', '.filter-', '.btn',
+    '.data-table', '.badge',
+)
+
+_COMENTARIOS = re.compile(r'/\*.*?\*/', re.S)
+
+
+def _es_critico(selector):
+    if ':hover' in selector:
+        return False
+    return any(
+        parte.strip() == critico or parte.strip().startswith(critico)
+        for parte in selector.split(',')
+        for critico in SELECTORES_CRITICOS
+    )
+
+
+def _bloques(css):
+    """Divide el CSS en pares (prelude, cuerpo) de primer nivel"""
+    bloques = []
+    profundidad = 0
+    inicio = 0
+    prelude = ''
+    for i, caracter in enumerate(css):
+        if caracter == '{':
+            if profundidad == 0:
+                prelude = css[inicio:i].strip()
+                inicio = i + 1
+            profundidad += 1
+        elif caracter == '}':
+            profundidad -= 1
+            if profundidad == 0:
+                bloques.append((prelude, css[inicio:i].strip()))
+                inicio = i + 1
+    return bloques
+
+
+def extraer_css_critico(css):
+    """Devuelve, minificadas, las reglas de `css` cuyo selector es crítico"""
+    salida = []
+    for prelude, cuerpo in _bloques(_COMENTARIOS.sub('', css)):
+        if prelude.startswith('@media'):
+            interior = extraer_css_critico(cuerpo)
+            if interior:
+                salida.append(f'{prelude}{{{interior}}}')
+        elif _es_critico(prelude):
+            declaraciones = ';'.join(
+                ' '.join(d.split()) for d in cuerpo.split(';') if d.strip()
+            )
+            salida.append(f"{' '.join(prelude.split())}{{{declaraciones}}}")
+    return ''.join(salida)
+
+
+class GesCochesStaticStorage(CompressedManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run and CSS_ORIGEN in paths:
+            origen_storage, origen_path = paths[CSS_ORIGEN]
+            with origen_storage.open(origen_path) as origen:
+                critico = extraer_css_critico(origen.read().decode('utf-8'))
+            if self.exists(CSS_CRITICO):
+                self.delete(CSS_CRITICO)
+            self._save(CSS_CRITICO, ContentFile(critico.encode('utf-8')))
+            # Se añade a la lista para que también tenga hash y .gz/.br
+            paths = {**paths, CSS_CRITICO: (self, CSS_CRITICO)}
+        yield from super().post_process(paths, dry_run=dry_run, **options)
@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # Antes que el admin: su final_catch_all_view respondería 404 a las páginas
+    # propias bajo admin/ (asignar vehículos, limpiar asignaciones, pool)
     path('', include('vehiculos.urls')),
+    path('admin/', admin.site.urls),
 ]
@@ -0,0 +1,94 @@
+"""
+Configuración de gunicorn (se carga sola desde el directorio del proyecto).
+
+Arranque rápido: la aplicación Django se importa una sola vez en el proceso
+master (preload_app) y los workers la heredan con fork en lugar de repetir
+cada uno django.setup(). Antes de hacer fork se calientan las URLs y las
+plantillas, se cierran las conexiones a BD y se congela el recolector de
+basura (gc.freeze) para que los objetos heredados no se toquen y sus
+páginas de memoria se compartan copy-on-write entre workers.
+
+Tareas periódicas: Render solo da un proceso web, así que el master lanza
+`manage.py ejecutar_tareas` como proceso hijo y lo vuelve a lanzar si
+termina (GUNICORN_TAREAS=false lo desactiva). Con varias instancias cada
+una tiene su runner; el lease en BD evita que una tarea se ejecute dos
+veces.
+
+Medir el arranque: python manage.py medir_arranque
+"""
+import gc
+import os
+import subprocess
+import sys
+import threading
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Con más de un hilo por worker conviene DATABASE_POOL: los hilos comparten el pool
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() != 'false'
+tareas = os.environ.get('GUNICORN_TAREAS', 'true').lower() != 'false'
+
+# Segundos de espera antes de relanzar el runner de tareas si termina
+REINICIO_TAREAS = 10
+
+# Plantillas que se compilan en el master para que los workers las hereden
+PLANTILLAS_PRECARGADAS = [
+    'vehiculos/dashboard.html',
+    'vehiculos/lista_vehiculos.html',
+    'vehiculos/lista_asignaciones.html',
+    'vehiculos/filas_vehiculos.html',
+    'vehiculos/filas_asignaciones.html',
+    'vehiculos/detalle_vehiculo.html',
+]
+
+
+_runner = {'proceso': None, 'parar': threading.Event()}
+
+
+def _supervisar_tareas(server):
+    """Mantiene vivo `manage.py ejecutar_tareas` mientras corre el master"""
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    while not _runner['parar'].is_set():
+        proceso = subprocess.Popen([sys.executable, 'manage.py', 'ejecutar_tareas'], cwd=directorio)
+        _runner['proceso'] = proceso
+        server.log.info('Runner de tareas arrancado (pid %s)', proceso.pid)
+        codigo = proceso.wait()
+        if _runner['parar'].wait(REINICIO_TAREAS):
+            break
+        server.log.error('El runner de tareas ha terminado con código %s: se relanza', codigo)
+
+
+def when_ready(server):
+    if tareas and _runner['proceso'] is None:
+        threading.Thread(target=_supervisar_tareas, args=(server,), name='tareas', daemon=True).start()
+
+    if not preload_app:
+        return
+
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    # Importa urls.py, vistas y admin
+    get_resolver().url_patterns
+    for plantilla in PLANTILLAS_PRECARGADAS:
+        get_template(plantilla)
+
+    # Una conexión abierta en el master se compartiría entre workers
+    connections.close_all()
+    # Con DATABASE_POOL, close_all() las deja en el pool: se cierran de verdad
+    from gescoches.postgresql.pool import cerrar_pools
+    cerrar_pools()
+    gc.freeze()
+
+
+def on_exit(server):
+    _runner['parar'].set()
+    proceso = _runner['proceso']
+    if proceso is not None and proceso.poll() is None:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
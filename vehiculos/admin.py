@@ -1,42 +1,193 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.db.models import Count, Q
 from django.utils.html import format_html
 from django.urls import reverse
 from django.http import HttpResponseRedirect
 from django.utils import timezone
-from .models import Vehiculo, Asignacion, EstadoVehiculo
+from datetime import datetime, time, timedelta
+from . import facetas
+from .models import (
+    Vehiculo, Asignacion, EstadoVehiculo, CambioEstado, TareaProgramada, EjecucionTarea, ResumenFlota,
+    Taller, PerfilUsuario, taller_de_usuario,
+)
+from .sincronizacion import borrar_con_lapidas
+from .transiciones import aplicar_transicion_masiva
+
+
+class PorTallerAdminMixin:
+    """Limita el listado y los desplegables al taller del usuario (si tiene uno)"""
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).para_usuario(request.user)
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        taller_id = taller_de_usuario(request.user)
+        if taller_id is not None:
+            if db_field.name == 'taller':
+                kwargs['queryset'] = Taller.objects.filter(id=taller_id)
+                kwargs['initial'] = taller_id
+            elif db_field.name == 'vehiculo':
+                kwargs['queryset'] = Vehiculo.objects.del_taller(taller_id)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class FiltroConContador(admin.SimpleListFilter):
+    """
+    Filtro con el número de filas de cada opción. Las opciones salen de los
+    contadores de vehiculos.facetas (una consulta a una tabla pequeña) en
+    lugar de un SELECT DISTINCT sobre toda la tabla en cada carga.
+    Los números son los del taller del usuario o del taller filtrado.
+    """
+    faceta = None
+    campo = None
+    
+    def taller(self, request):
+        taller_id = taller_de_usuario(request.user)
+        if taller_id is None:
+            elegido = request.GET.get('taller__id__exact', '')
+            taller_id = int(elegido) if elegido.isdigit() else None
+        return taller_id
+    
+    def etiqueta(self, valor):
+        return valor
+    
+    def lookups(self, request, model_admin):
+        totales = facetas.totales(self.faceta, self.taller(request))
+        return [(valor, f'{self.etiqueta(valor)} ({totales[valor]})') for valor in sorted(totales)]
+    
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(**{self.campo: self.value()})
+        return queryset
+
+
+class FiltroMarca(FiltroConContador):
+    title = 'marca'
+    parameter_name = 'marca'
+    faceta = 'vehiculo.marca'
+    campo = 'marca'
+
+
+class FiltroAño(FiltroConContador):
+    title = 'año'
+    parameter_name = 'año'
+    faceta = 'vehiculo.año'
+    campo = 'año'
+
+
+class FiltroActiva(FiltroConContador):
+    title = 'asignación activa'
+    parameter_name = 'activa'
+    faceta = 'asignacion.activa'
+    
+    def lookups(self, request, model_admin):
+        totales = facetas.totales(self.faceta, self.taller(request))
+        return [
+            (valor, f'{etiqueta} ({totales[valor]})')
+            for valor, etiqueta in (('1', 'Sí'), ('0', 'No'))
+            if valor in totales
+        ]
+    
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(activa=self.value() == '1')
+        return queryset
+
+
+class FiltroFechaInicio(FiltroConContador):
+    """Periodos de fecha_inicio; su número es la suma de los contadores por día"""
+    title = 'fecha de inicio'
+    parameter_name = 'periodo'
+    faceta = 'asignacion.dia_inicio'
+    
+    def periodos(self):
+        """{clave: (etiqueta, primer día, día siguiente al último)}"""
+        hoy = timezone.localdate()
+        inicio_mes = hoy.replace(day=1)
+        return {
+            'hoy': ('Hoy', hoy, hoy + timedelta(days=1)),
+            '7dias': ('Últimos 7 días', hoy - timedelta(days=7), hoy + timedelta(days=1)),
+            'mes': ('Este mes', inicio_mes, (inicio_mes + timedelta(days=32)).replace(day=1)),
+            'año': ('Este año', hoy.replace(month=1, day=1), hoy.replace(year=hoy.year + 1, month=1, day=1)),
+        }
+    
+    def lookups(self, request, model_admin):
+        periodos = self.periodos()
+        desde = min(inicio for _, inicio, _ in periodos.values())
+        # Solo los días desde el inicio del periodo más largo
+        totales = facetas.totales(self.faceta, self.taller(request), desde=desde.isoformat())
+        opciones = []
+        for clave, (etiqueta, inicio, fin) in periodos.items():
+            total = sum(filas for dia, filas in totales.items() if inicio.isoformat() <= dia < fin.isoformat())
+            opciones.append((clave, f'{etiqueta} ({total})'))
+        return opciones
+    
+    def queryset(self, request, queryset):
+        periodo = self.periodos().get(self.value())
+        if periodo is None:
+            return queryset
+        _, inicio, fin = periodo
+        return queryset.filter(
+            fecha_inicio__gte=timezone.make_aware(datetime.combine(inicio, time.min)),
+            fecha_inicio__lt=timezone.make_aware(datetime.combine(fin, time.min)),
+        )
+
+
+@admin.register(Taller)
+class TallerAdmin(admin.ModelAdmin):
+    list_display = ['codigo', 'nombre', 'num_vehiculos']
+    search_fields = ['codigo', 'nombre']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(num_vehiculos=Count('vehiculos'))
+    
+    def num_vehiculos(self, obj):
+        return obj.num_vehiculos
+    num_vehiculos.short_description = 'Vehículos'
+    num_vehiculos.admin_order_field = 'num_vehiculos'
+
+
+@admin.register(PerfilUsuario)
+class PerfilUsuarioAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'taller']
+    list_filter = ['taller']
+    search_fields = ['usuario__username']
+    list_select_related = ['usuario', 'taller']
 
 
 @admin.register(Vehiculo)
-class VehiculoAdmin(admin.ModelAdmin):
+class VehiculoAdmin(PorTallerAdminMixin, admin.ModelAdmin):
     list_display = [
         'matricula', 
         'marca_modelo', 
+        'taller',
         'color', 
         'año', 
         'estado_badge', 
         'kilometraje',
         'dias_sin_revision'
     ]
-    list_filter = ['estado', 'marca', 'año']
+    list_filter = ['taller', 'estado', FiltroMarca, FiltroAño]
+    list_select_related = ['taller']
     search_fields = ['matricula', 'marca', 'modelo']
     ordering = ['estado', 'matricula']
     
     fieldsets = (
         ('Información del Vehículo', {
-            'fields': ('matricula', 'marca', 'modelo', 'color', 'año')
+            'fields': ('taller', 'matricula', 'marca', 'modelo', 'color', 'año')
         }),
         ('Estado y Uso', {
             'fields': ('estado', 'kilometraje')
         }),
         ('Fechas', {
-            'fields': ('fecha_alta', 'fecha_ultima_revision')
+            'fields': ('fecha_alta', 'fecha_ultima_revision', 'disponible_desde')
         }),
         ('Observaciones', {
             'fields': ('observaciones',),
             'classes': ('collapse',)
         }),
     )
+    readonly_fields = ['disponible_desde']
     
     actions = ['marcar_disponible', 'marcar_baja']
     
@@ -75,16 +226,40 @@ class VehiculoAdmin(admin.ModelAdmin):
         return format_html('<span style="color: red;">Sin revisión</span>')
     dias_sin_revision.short_description = 'Última Revisión'
     
+    def _transicion_masiva(self, request, queryset, estado_nuevo, mensaje):
+        resultado = aplicar_transicion_masiva(queryset, estado_nuevo, usuario=request.user)
+        self.message_user(request, f'{resultado.aplicados} vehículo(s) {mensaje}.')
+        if resultado.bloqueados:
+            muestra = ', '.join(resultado.bloqueados[:20])
+            if len(resultado.bloqueados) > 20:
+                muestra += f' y {len(resultado.bloqueados) - 20} más'
+            self.message_user(
+                request,
+                f'{len(resultado.bloqueados)} vehículo(s) no cambiado(s) por tener una asignación activa: {muestra}',
+                level=messages.WARNING
+            )
+    
     def marcar_disponible(self, request, queryset):
-        updated = queryset.update(estado=EstadoVehiculo.DISPONIBLE)
-        self.message_user(request, f'{updated} vehículo(s) marcado(s) como disponible(s).')
+        self._transicion_masiva(request, queryset, EstadoVehiculo.DISPONIBLE, 'marcado(s) como disponible(s)')
     marcar_disponible.short_description = "Marcar como Disponible"
     
     def marcar_baja(self, request, queryset):
-        updated = queryset.update(estado=EstadoVehiculo.BAJA)
-        self.message_user(request, f'{updated} vehículo(s) dado(s) de baja.')
+        self._transicion_masiva(request, queryset, EstadoVehiculo.BAJA, 'dado(s) de baja')
     marcar_baja.short_description = "Dar de Baja"
 
+    # Los borrados dejan lápidas para la sincronización incremental
+    def delete_model(self, request, obj):
+        borrar_con_lapidas(Vehiculo.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        borrar_con_lapidas(queryset)
+
+    def changelist_view(self, request, extra_context=None):
+        """Agregar botón de auditoría en la vista de lista"""
+        extra_context = extra_context or {}
+        extra_context['auditoria_url'] = reverse('vehiculos:auditoria_admin')
+        return super().changelist_view(request, extra_context=extra_context)
+
     # Al guardar, redirigir al dashboard (no quedarse en admin)
     def _redirect_to_dashboard(self):
         return HttpResponseRedirect(reverse('vehiculos:dashboard'))
@@ -101,18 +276,21 @@ class VehiculoAdmin(admin.ModelAdmin):
 
 
 @admin.register(Asignacion)
-class AsignacionAdmin(admin.ModelAdmin):
+class AsignacionAdmin(PorTallerAdminMixin, admin.ModelAdmin):
     list_display = [
         'vehiculo',
+        'taller',
         'cliente',
         'fecha_inicio',
         'fecha_fin',
         'estado_asignacion',
         'km_recorridos'
     ]
-    list_filter = ['activa', 'fecha_inicio']
+    # Sin date_hierarchy: sacaba los años con un SELECT DISTINCT sobre toda la tabla
+    # en cada carga; los periodos con contador están en FiltroFechaInicio
+    list_filter = ['taller', FiltroActiva, FiltroFechaInicio]
+    list_select_related = ['vehiculo', 'taller']
     search_fields = ['vehiculo__matricula', 'cliente']
-    date_hierarchy = 'fecha_inicio'
     ordering = ['-fecha_inicio']
     
     fieldsets = (
@@ -159,6 +337,12 @@ class AsignacionAdmin(admin.ModelAdmin):
         self.message_user(request, f'{count} asignación(es) finalizada(s).')
     finalizar_asignaciones.short_description = "Finalizar Asignaciones Seleccionadas"
 
+    def delete_model(self, request, obj):
+        borrar_con_lapidas(Asignacion.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        borrar_con_lapidas(queryset)
+
     # Al guardar, redirigir al dashboard
     def response_add(self, request, obj, post_url_continue=None):
         if '_continue' not in request.POST and '_addanother' not in request.POST:
@@ -171,12 +355,70 @@ class AsignacionAdmin(admin.ModelAdmin):
         return super().response_change(request, obj)
     
     def changelist_view(self, request, extra_context=None):
-        """Agregar botón de limpieza en la vista de lista"""
+        """Agregar botones de asignación automática y de limpieza en la vista de lista"""
         extra_context = extra_context or {}
+        extra_context['asignar_lote_url'] = reverse('vehiculos:asignar_lote_admin')
         extra_context['limpiar_asignaciones_url'] = reverse('vehiculos:limpiar_asignaciones_admin')
         return super().changelist_view(request, extra_context=extra_context)
 
 
+@admin.register(CambioEstado)
+class CambioEstadoAdmin(admin.ModelAdmin):
+    """Historial de estados: solo lectura, las filas las genera vehiculos.historial"""
+    list_display = ['fecha', 'vehiculo', 'estado_anterior', 'estado_nuevo', 'causa', 'usuario']
+    list_filter = ['causa', 'estado_nuevo']
+    search_fields = ['vehiculo__matricula']
+    date_hierarchy = 'fecha'
+    list_select_related = ['vehiculo', 'usuario']
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        taller_id = taller_de_usuario(request.user)
+        if taller_id is not None:
+            queryset = queryset.filter(vehiculo__taller_id=taller_id)
+        return queryset
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TareaProgramada)
+class TareaProgramadaAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'proxima_ejecucion', 'fallos_consecutivos', 'bloqueada_hasta', 'propietario']
+    readonly_fields = ['bloqueada_hasta', 'propietario', 'fallos_consecutivos']
+
+
+@admin.register(EjecucionTarea)
+class EjecucionTareaAdmin(admin.ModelAdmin):
+    list_display = ['tarea', 'inicio', 'duracion', 'filas', 'exito']
+    list_filter = ['tarea', 'exito']
+    date_hierarchy = 'inicio'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumenFlota)
+class ResumenFlotaAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'total', 'disponibles', 'en_uso', 'baja', 'asignaciones_iniciadas', 'km_recorridos']
+    date_hierarchy = 'fecha'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Personalización del Admin Site
 admin.site.site_header = 'GesCoches - Gestión de Vehículos'
 admin.site.site_title = 'GesCoches Admin'
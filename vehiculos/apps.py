@@ -1,7 +1,20 @@
+import atexit
+
 from django.apps import AppConfig
+from django.core.signals import request_finished
 
 
 class VehiculosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vehiculos'
     verbose_name = 'Gestión de Vehículos'
+
+    def ready(self):
+        from . import historial
+        from . import autenticacion  # noqa: F401 (registra la invalidación del usuario cacheado)
+        from . import facetas  # noqa: F401 (registra los contadores de los filtros del admin)
+
+        # Volcar el historial de estados una vez enviada la respuesta
+        request_finished.connect(historial.finalizar_peticion, dispatch_uid='vehiculos_historial')
+        # Y lo que quede pendiente en shell/management commands al salir
+        atexit.register(historial.volcar)
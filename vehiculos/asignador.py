@@ -0,0 +1,94 @@
+"""
+Asignación automática de vehículos de sustitución.
+
+Candidatos: vehículos DISPONIBLE del taller con la revisión al día (última
+revisión hace como mucho REVISION_MAXIMA_DIAS días). Orden de prioridad:
+
+1. Menor kilometraje
+2. Más tiempo parado (Vehiculo.disponible_desde más antiguo: fin de su
+   última asignación, o la fecha de alta si nunca se ha asignado)
+
+disponible_desde se mantiene al guardar el vehículo y en las transiciones
+masivas, y el índice parcial vehiculo_candidatos_idx (taller, kilometraje,
+disponible_desde, id) WHERE estado = 'DISPONIBLE' ya está en ese orden: la
+consulta recorre el índice y se detiene en cuanto tiene N candidatos, sin
+ordenar la flota.
+
+Uso:
+    from vehiculos import asignador
+    asignador.candidatos(taller_id)[:5]
+    asignador.asignar_lote(taller_id, 'Cliente S.L.', 3, 'Siniestro', usuario=request.user)
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import facetas, historial
+from .models import Asignacion, CausaCambio, EstadoVehiculo, SecuenciaSync, Vehiculo
+
+# Igual que el aviso en rojo de "Última Revisión" del admin
+REVISION_MAXIMA_DIAS = 365
+
+
+class CandidatosInsuficientes(ValueError):
+    pass
+
+
+def candidatos(taller_id):
+    """Queryset de vehículos asignables del taller, en orden de prioridad"""
+    limite_revision = timezone.localdate() - timedelta(days=REVISION_MAXIMA_DIAS)
+    return (
+        Vehiculo.objects.del_taller(taller_id)
+        .filter(estado=EstadoVehiculo.DISPONIBLE, fecha_ultima_revision__gte=limite_revision)
+        .order_by('kilometraje', 'disponible_desde', 'id')
+    )
+
+
+def asignar_lote(taller_id, cliente, cantidad, motivo, usuario=None, observaciones=''):
+    """
+    Asigna a `cliente` los `cantidad` mejores candidatos del taller en una
+    sola transacción: o se asignan todos o ninguno. Devuelve las
+    asignaciones creadas en orden de prioridad.
+    """
+    with transaction.atomic():
+        # Con PostgreSQL, otra asignación en curso no espera a esta: se salta sus vehículos
+        elegidos = list(
+            candidatos(taller_id)
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'kilometraje')[:cantidad]
+        )
+        if len(elegidos) < cantidad:
+            raise CandidatosInsuficientes(
+                f'Solo hay {len(elegidos)} vehículo(s) disponible(s) con la revisión al día '
+                f'y se han pedido {cantidad}'
+            )
+
+        version = SecuenciaSync.siguiente()
+        ahora = timezone.now()
+        # bulk_create y update no pasan por save() ni por las señales: versión, taller, estado y contadores a mano
+        asignaciones = Asignacion.objects.bulk_create([
+            Asignacion(
+                vehiculo_id=vehiculo_id,
+                taller_id=taller_id,
+                cliente=cliente,
+                fecha_inicio=ahora,
+                kilometraje_salida=kilometraje,
+                motivo=motivo,
+                observaciones=observaciones,
+                activa=True,
+                version=version,
+            )
+            for vehiculo_id, kilometraje in elegidos
+        ])
+        facetas.sumar(asignaciones)
+        ids = [vehiculo_id for vehiculo_id, _ in elegidos]
+        Vehiculo.objects.filter(id__in=ids).update(estado=EstadoVehiculo.EN_USO, version=version)
+        historial.registrar_lote(
+            [(vehiculo_id, EstadoVehiculo.DISPONIBLE) for vehiculo_id in ids],
+            EstadoVehiculo.EN_USO,
+            CausaCambio.ASIGNACION,
+            usuario,
+        )
+
+    return asignaciones
@@ -0,0 +1,109 @@
+"""
+Auditoría de coherencia entre vehículos y asignaciones.
+
+Las acciones masivas (queryset.update(), borrados en bloque, SQL a mano)
+no pasan por las señales de models.py, así que Vehiculo.estado y
+Vehiculo.kilometraje pueden quedar desalineados con sus asignaciones.
+Cada comprobación es una sola consulta sobre todo el conjunto, no un bucle
+por vehículo, apoyada en dos índices de Asignacion (activas por vehículo y
+vehículo + fecha_fin con el kilometraje de entrada):
+
+- en_uso_sin_asignacion: EN_USO sin ninguna asignación activa
+- disponible_con_asignacion: DISPONIBLE con una asignación activa
+- kilometraje_atrasado: kilometraje menor que el kilometraje de entrada de
+  su última asignación finalizada (la de fecha_fin más reciente)
+
+reparar() corrige las tres en bloque: los estados con
+aplicar_transicion_masiva (versión, historial y disponible_desde) y el
+kilometraje con un único UPDATE.
+
+Uso:
+    from vehiculos import auditoria
+    auditoria.auditar(Vehiculo.objects.para_usuario(request.user))
+    auditoria.reparar(Vehiculo.objects.all(), usuario=request.user)
+Comando: python manage.py auditar_vehiculos [--reparar]
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from .models import Asignacion, CausaCambio, EstadoVehiculo, SecuenciaSync
+from .transiciones import aplicar_transicion_masiva
+
+Comprobacion = namedtuple('Comprobacion', ['clave', 'titulo', 'total', 'muestra'])
+
+COLUMNAS_MUESTRA = ('id', 'matricula', 'estado', 'kilometraje', 'km_entrada')
+
+
+def _asignacion_activa():
+    return Exists(Asignacion.objects.filter(vehiculo=OuterRef('pk'), activa=True))
+
+
+def _km_entrada():
+    # Kilometraje de la última entrada: una lectura de asignacion_ultima_entrada_idx por vehículo
+    return Subquery(
+        Asignacion.objects.filter(vehiculo=OuterRef('pk'), kilometraje_entrada__isnull=False, fecha_fin__isnull=False)
+        .order_by('-fecha_fin', '-id')
+        .values('kilometraje_entrada')[:1]
+    )
+
+
+def en_uso_sin_asignacion(vehiculos):
+    return vehiculos.filter(estado=EstadoVehiculo.EN_USO).exclude(_asignacion_activa())
+
+
+def disponible_con_asignacion(vehiculos):
+    # Se parte de las asignaciones activas (pocas) y no de todos los disponibles
+    activas = Asignacion.objects.filter(activa=True).values('vehiculo_id')
+    return vehiculos.filter(id__in=activas, estado=EstadoVehiculo.DISPONIBLE)
+
+
+def kilometraje_atrasado(vehiculos):
+    return vehiculos.annotate(km_entrada=_km_entrada()).filter(km_entrada__gt=F('kilometraje'))
+
+
+COMPROBACIONES = [
+    ('en_uso_sin_asignacion', 'En uso sin asignación activa', en_uso_sin_asignacion),
+    ('disponible_con_asignacion', 'Disponibles con una asignación activa', disponible_con_asignacion),
+    ('kilometraje_atrasado', 'Kilometraje por debajo del de la última entrada', kilometraje_atrasado),
+]
+
+
+def auditar(vehiculos, muestra=20):
+    """
+    Lista de Comprobacion con el total de vehículos afectados y los
+    primeros `muestra` como tuplas de COLUMNAS_MUESTRA.
+    """
+    resultado = []
+    for clave, titulo, comprobacion in COMPROBACIONES:
+        afectados = comprobacion(vehiculos).order_by('matricula')
+        filas = list(
+            afectados.annotate(km_entrada=_km_entrada()).values_list(*COLUMNAS_MUESTRA)[:muestra]
+        ) if muestra else []
+        total = len(filas) if len(filas) < muestra else afectados.count()
+        resultado.append(Comprobacion(clave, titulo, total, filas))
+    return resultado
+
+
+def reparar(vehiculos, usuario=None):
+    """
+    Corrige todas las incoherencias de `vehiculos` en una transacción.
+    Devuelve {clave: vehículos corregidos}.
+    """
+    with transaction.atomic():
+        reparados = {
+            'en_uso_sin_asignacion': aplicar_transicion_masiva(
+                en_uso_sin_asignacion(vehiculos), EstadoVehiculo.DISPONIBLE,
+                causa=CausaCambio.AUDITORIA, usuario=usuario,
+            ).aplicados,
+            'disponible_con_asignacion': aplicar_transicion_masiva(
+                disponible_con_asignacion(vehiculos), EstadoVehiculo.EN_USO,
+                causa=CausaCambio.AUDITORIA, usuario=usuario,
+            ).aplicados,
+        }
+        reparados['kilometraje_atrasado'] = kilometraje_atrasado(vehiculos).update(
+            kilometraje=_km_entrada(),
+            version=SecuenciaSync.siguiente(),
+        )
+    return reparados
@@ -0,0 +1,50 @@
+"""
+Backend de autenticación con caché del usuario.
+
+AuthenticationMiddleware carga el usuario de la sesión en cada petición
+(una consulta a auth_user). CachedModelBackend guarda ese usuario en la
+caché durante AUTH_USUARIO_CACHE_TTL segundos; el usuario se invalida al
+guardarlo o borrarlo (cambio de contraseña, permisos, last_login...).
+
+El perfil (taller del usuario) se carga antes de guardar en la caché, para
+que filtrar por taller tampoco haga consultas. Junto con SESSION_ENGINE =
+cached_db, una petición autenticada con la caché caliente no hace ninguna
+consulta de sesión, de usuario ni de perfil.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import PerfilUsuario, taller_de_usuario
+
+
+def _clave(user_id):
+    return f'gescoches:usuario:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        clave = _clave(user_id)
+        usuario = cache.get(clave)
+        if usuario is None:
+            usuario = super().get_user(user_id)
+            if usuario is not None:
+                taller_de_usuario(usuario)  # deja el perfil (o su ausencia) en el objeto
+                cache.set(clave, usuario, settings.AUTH_USUARIO_CACHE_TTL)
+        return usuario
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    cache.delete(_clave(instance.pk))
+
+
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+def invalidar_perfil_cacheado(sender, instance, **kwargs):
+    cache.delete(_clave(instance.usuario_id))
@@ -0,0 +1,183 @@
+"""
+Contadores de los filtros del admin.
+
+Con list_filter = ['marca', 'año'] el admin calcula las opciones con un
+SELECT DISTINCT sobre toda la tabla en cada carga del listado. Aquí cada
+opción tiene su fila en ContadorFiltro (faceta, taller, valor, total) y los
+filtros de vehiculos/admin.py solo leen esa tabla pequeña, que además da el
+número de filas de cada opción.
+
+Los contadores se actualizan de forma incremental, en la misma transacción
+que el cambio:
+
+- save() de Vehiculo/Asignacion: +1 al crear; al editar, -1 al valor leído
+  (from_db guarda CAMPOS_FILTRO) y +1 al nuevo si ha cambiado
+- asignador.asignar_lote (bulk_create): sumar()
+- sincronizacion.borrar_con_lapidas: descontar() antes del delete()
+- Vehiculo.save() al cambiar de taller: descontar() y contar() alrededor
+  del update() de sus asignaciones
+
+Lo que no pasa por ahí (queryset.update() de esos campos, loaddata, SQL a
+mano) lo corrige la tarea periódica `recalcular_filtros`, que rehace la
+tabla entera.
+
+Uso:
+    from vehiculos import facetas
+    facetas.totales('vehiculo.marca', taller_id)   # {'Seat': 12, ...}
+    facetas.recalcular()
+"""
+from collections import Counter
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Asignacion, ContadorFiltro, Vehiculo
+
+# nombre -> (modelo, campo)
+FACETAS = {
+    'vehiculo.marca': (Vehiculo, 'marca'),
+    'vehiculo.año': (Vehiculo, 'año'),
+    'asignacion.activa': (Asignacion, 'activa'),
+    # Un contador por día (fecha local): los periodos del filtro suman días
+    'asignacion.dia_inicio': (Asignacion, 'fecha_inicio'),
+}
+
+
+def _facetas_de(modelo):
+    return [(nombre, campo) for nombre, (modelo_faceta, campo) in FACETAS.items() if modelo_faceta is modelo]
+
+
+def clave(valor):
+    """Valor de una columna tal como se guarda en ContadorFiltro.valor"""
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    if isinstance(valor, datetime):
+        return timezone.localdate(valor).isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _expresion(campo):
+    # El día se agrupa en la zona horaria local, igual que clave()
+    return TruncDate(campo) if campo == 'fecha_inicio' else F(campo)
+
+
+def totales(faceta, taller_id=None, desde=None):
+    """{valor: total} de la faceta, de un taller o de todos; solo valores con filas"""
+    contadores = ContadorFiltro.objects.filter(faceta=faceta)
+    if taller_id is not None:
+        contadores = contadores.filter(taller_id=taller_id)
+    if desde is not None:
+        contadores = contadores.filter(valor__gte=desde)
+    return {
+        valor: total
+        for valor, total in contadores.values('valor').annotate(suma=Sum('total')).values_list('valor', 'suma')
+        if total > 0
+    }
+
+
+def ajustar(cambios):
+    """Suma a cada contador su delta. `cambios`: {(faceta, taller_id, valor): delta}"""
+    for (faceta, taller_id, valor), delta in cambios.items():
+        if not delta:
+            continue
+        contador = ContadorFiltro.objects.filter(faceta=faceta, taller_id=taller_id, valor=valor)
+        if not contador.update(total=F('total') + delta):
+            ContadorFiltro.objects.bulk_create(
+                [ContadorFiltro(faceta=faceta, taller_id=taller_id, valor=valor)],
+                ignore_conflicts=True,
+            )
+            contador.update(total=F('total') + delta)
+
+
+def sumar(instancias):
+    """Cuenta instancias recién creadas sin save() (bulk_create)"""
+    cambios = Counter()
+    for instancia in instancias:
+        for faceta, campo in _facetas_de(type(instancia)):
+            cambios[faceta, instancia.taller_id, clave(getattr(instancia, campo))] += 1
+    ajustar(cambios)
+
+
+def _agrupar(queryset, campo):
+    """[(taller_id, valor, filas)] del queryset con un GROUP BY"""
+    return [
+        (taller_id, clave(valor), filas)
+        for taller_id, valor, filas in (
+            queryset.order_by()
+            .annotate(valor_faceta=_expresion(campo))
+            .values('taller_id', 'valor_faceta')
+            .annotate(filas=Count('id'))
+            .values_list('taller_id', 'valor_faceta', 'filas')
+        )
+    ]
+
+
+def _cambios_queryset(queryset, signo):
+    querysets = [queryset]
+    if queryset.model is Vehiculo:
+        querysets.append(Asignacion.objects.filter(vehiculo__in=queryset))
+    cambios = Counter()
+    for qs in querysets:
+        for faceta, campo in _facetas_de(qs.model):
+            for taller_id, valor, filas in _agrupar(qs, campo):
+                cambios[faceta, taller_id, valor] += signo * filas
+    return cambios
+
+
+def descontar(queryset):
+    """Resta las filas del queryset que se va a borrar (y sus asignaciones en cascada)"""
+    ajustar(_cambios_queryset(queryset, -1))
+
+
+def contar(queryset):
+    """Suma las filas del queryset (y sus asignaciones); con descontar() antes, sirve para un update()"""
+    ajustar(_cambios_queryset(queryset, 1))
+
+
+def recalcular():
+    """Rehace todos los contadores desde las tablas. Devuelve los contadores creados."""
+    contadores = [
+        ContadorFiltro(faceta=faceta, taller_id=taller_id, valor=valor, total=filas)
+        for faceta, (modelo, campo) in FACETAS.items()
+        for taller_id, valor, filas in _agrupar(modelo.objects.all(), campo)
+    ]
+    with transaction.atomic():
+        ContadorFiltro.objects.all().delete()
+        ContadorFiltro.objects.bulk_create(contadores, batch_size=1000)
+    return len(contadores)
+
+
+@receiver(post_save, sender=Vehiculo)
+@receiver(post_save, sender=Asignacion)
+def actualizar_contadores(sender, instance, created, raw=False, **kwargs):
+    """Mueve los contadores de los valores que han cambiado en este save()"""
+    if raw:
+        return
+    actuales = {campo: getattr(instance, campo) for campo in sender.CAMPOS_FILTRO}
+    originales = None if created else getattr(instance, '_filtros_originales', None)
+    instance._filtros_originales = actuales
+    if not created and originales is None:
+        # Instancia no leída de la BD: no se sabe qué valores tenía
+        return
+
+    cambios = Counter()
+    for faceta, campo in _facetas_de(sender):
+        nuevo = (faceta, actuales['taller_id'], clave(actuales[campo]))
+        if created:
+            cambios[nuevo] += 1
+            continue
+        if originales['taller_id'] is None or originales[campo] is None:
+            # Campo diferido (only()/defer()): no se conoce el valor anterior
+            continue
+        anterior = (faceta, originales['taller_id'], clave(originales[campo]))
+        if anterior != nuevo:
+            cambios[anterior] -= 1
+            cambios[nuevo] += 1
+    ajustar(cambios)
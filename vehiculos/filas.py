@@ -0,0 +1,109 @@
+"""
+Filas ligeras para los listados de solo lectura.
+
+El dashboard y los listados solo pintan unas pocas columnas, pero un
+queryset normal construye una instancia completa del modelo por fila (y
+otra del Vehiculo con select_related), cada una con su __dict__ y su
+_state. Aquí las filas se leen con values_list().iterator(), en bloques y
+con solo las columnas que se muestran, y se guardan en objetos con
+__slots__ que ya traen calculados los valores de presentación (etiqueta
+del estado, km recorridos). Las columnas con pocos valores distintos
+(marca, modelo, color, estado) se comparten con sys.intern en lugar de
+guardar una copia de la cadena por fila.
+
+Las filas exponen los mismos nombres que usan las plantillas con los
+modelos (vehiculo.get_estado_display, asignacion.vehiculo.matricula...),
+así que las plantillas de Django y de Jinja2 no cambian.
+
+Los listados en streaming (vehiculos/streaming.py) usan iterar_vehiculos e
+iterar_asignaciones, que van entregando las filas sin guardarlas en una
+lista.
+
+Medir la memoria por petición: python manage.py medir_memoria_listados
+"""
+import sys
+
+from .models import EstadoVehiculo
+
+# Filas que se leen de la BD de cada vez (iterator)
+TAMANO_BLOQUE = 2000
+
+ETIQUETAS_ESTADO = dict(EstadoVehiculo.choices)
+
+COLUMNAS_VEHICULO = ('id', 'matricula', 'marca', 'modelo', 'color', 'año', 'estado', 'kilometraje')
+
+COLUMNAS_ASIGNACION = (
+    'id', 'vehiculo__matricula', 'vehiculo__marca', 'vehiculo__modelo', 'vehiculo__estado',
+    'cliente', 'fecha_inicio', 'fecha_fin', 'kilometraje_salida', 'kilometraje_entrada', 'activa',
+)
+
+
+class FilaVehiculo:
+    __slots__ = COLUMNAS_VEHICULO + ('estado_display',)
+
+    def __init__(self, id, matricula, marca, modelo, color, año, estado, kilometraje):
+        self.id = id
+        self.matricula = matricula
+        self.marca = sys.intern(marca)
+        self.modelo = sys.intern(modelo)
+        self.color = sys.intern(color)
+        self.año = año
+        self.estado = sys.intern(estado)
+        self.kilometraje = kilometraje
+        self.estado_display = ETIQUETAS_ESTADO.get(estado, estado)
+
+    def get_estado_display(self):
+        return self.estado_display
+
+
+class FilaAsignacion:
+    """Asignación con los datos de su vehículo en la misma fila (matricula, marca, modelo, estado)"""
+    __slots__ = (
+        'id', 'matricula', 'marca', 'modelo', 'estado',
+        'cliente', 'fecha_inicio', 'fecha_fin', 'kilometraje_salida', 'kilometraje_entrada', 'activa',
+        'km_recorridos',
+    )
+
+    def __init__(self, id, matricula, marca, modelo, estado, cliente, fecha_inicio, fecha_fin,
+                 kilometraje_salida, kilometraje_entrada, activa):
+        self.id = id
+        self.matricula = matricula
+        self.marca = sys.intern(marca)
+        self.modelo = sys.intern(modelo)
+        self.estado = sys.intern(estado)
+        self.cliente = cliente
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.kilometraje_salida = kilometraje_salida
+        self.kilometraje_entrada = kilometraje_entrada
+        self.activa = activa
+        self.km_recorridos = (
+            kilometraje_entrada - kilometraje_salida if kilometraje_entrada is not None else None
+        )
+
+    @property
+    def vehiculo(self):
+        # Las plantillas usan asignacion.vehiculo.matricula: la propia fila hace de vehículo
+        return self
+
+
+def iterar_vehiculos(queryset):
+    """FilaVehiculo del queryset una a una, sin cargar el listado entero (streaming)"""
+    for fila in queryset.values_list(*COLUMNAS_VEHICULO).iterator(chunk_size=TAMANO_BLOQUE):
+        yield FilaVehiculo(*fila)
+
+
+def iterar_asignaciones(queryset):
+    """FilaAsignacion del queryset una a una, con el vehículo por JOIN y sin instanciarlo"""
+    for fila in queryset.values_list(*COLUMNAS_ASIGNACION).iterator(chunk_size=TAMANO_BLOQUE):
+        yield FilaAsignacion(*fila)
+
+
+def filas_vehiculos(queryset):
+    """Lista de FilaVehiculo del queryset (respeta filtros, orden y slicing)"""
+    return list(iterar_vehiculos(queryset))
+
+
+def filas_asignaciones(queryset):
+    """Lista de FilaAsignacion del queryset"""
+    return list(iterar_asignaciones(queryset))
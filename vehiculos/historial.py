@@ -0,0 +1,162 @@
+"""
+Historial de transiciones de estado de vehículos (write-behind).
+
+Registrar una transición no toca la base de datos: la fila se guarda en un
+buffer por hilo y se inserta más tarde con un único bulk_create.
+
+- Dentro de una petición, el buffer se vuelca al recibir request_finished,
+  es decir, cuando la respuesta ya se ha enviado al cliente.
+- Fuera de una petición (shell, management commands) se vuelca al llegar a
+  TAMANO_LOTE filas y, como último recurso, al salir del proceso.
+
+Las filas solo se encolan cuando la transacción que hizo el cambio se
+confirma, así un rollback no deja transiciones fantasma en el historial.
+
+Si el volcado falla no se pierde el lote: con un IntegrityError (p.ej. el
+vehículo se borró en la misma petición) se reintenta fila a fila y solo se
+descartan, con un error en el log, las filas que no se pueden insertar; con
+cualquier otro error de la BD las filas vuelven al buffer y se reintentan
+en el siguiente volcado. Para que una caída larga de la BD no haga crecer
+la memoria sin límite, el buffer guarda como mucho MAXIMO_PENDIENTES filas:
+al pasarse se descartan las más antiguas, con un aviso en el log.
+
+Uso:
+    from vehiculos import historial
+    historial.registrar(vehiculo.id, 'DISPONIBLE', 'BAJA', CausaCambio.EDICION)
+    historial.registrar_lote([(1, 'EN_USO'), (2, 'BAJA')], 'DISPONIBLE',
+                             CausaCambio.ACCION_MASIVA, usuario=request.user)
+"""
+import logging
+import threading
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+TAMANO_LOTE = 500
+MAXIMO_PENDIENTES = 100 * TAMANO_LOTE
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _pendientes():
+    if not hasattr(_local, 'pendientes'):
+        _local.pendientes = []
+    return _local.pendientes
+
+
+def iniciar_peticion(request):
+    """Llamado por HistorialEstadosMiddleware al empezar cada petición"""
+    _local.request = request
+
+
+def usuario_actual():
+    """Usuario autenticado de la petición en curso (o None)"""
+    request = getattr(_local, 'request', None)
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario
+    return None
+
+
+def registrar(vehiculo_id, estado_anterior, estado_nuevo, causa, usuario=None):
+    """Encola una transición de estado de un vehículo"""
+    registrar_lote([(vehiculo_id, estado_anterior)], estado_nuevo, causa, usuario)
+
+
+def registrar_lote(anteriores, estado_nuevo, causa, usuario=None):
+    """
+    Encola las transiciones de varios vehículos a un mismo estado.
+
+    `anteriores` es un iterable de pares (vehiculo_id, estado_anterior); los
+    vehículos que ya estaban en `estado_nuevo` se ignoran.
+    """
+    from .models import CambioEstado
+
+    usuario = usuario or usuario_actual()
+    fecha = timezone.now()
+    filas = [
+        CambioEstado(
+            vehiculo_id=vehiculo_id,
+            estado_anterior=anterior,
+            estado_nuevo=estado_nuevo,
+            causa=causa,
+            usuario=usuario,
+            fecha=fecha,
+        )
+        for vehiculo_id, anterior in anteriores
+        if anterior != estado_nuevo
+    ]
+    if filas:
+        transaction.on_commit(lambda: _encolar(filas))
+
+
+def _encolar(filas):
+    pendientes = _pendientes()
+    pendientes.extend(filas)
+    if getattr(_local, 'request', None) is None and len(pendientes) >= TAMANO_LOTE:
+        volcar()
+
+
+def volcar():
+    """Inserta en bloque las transiciones pendientes del hilo actual"""
+    from .models import CambioEstado
+
+    pendientes = _pendientes()
+    if not pendientes:
+        return 0
+    _local.pendientes = []
+    try:
+        with transaction.atomic():
+            CambioEstado.objects.bulk_create(pendientes, batch_size=TAMANO_LOTE)
+    except IntegrityError:
+        return _volcar_fila_a_fila(pendientes)
+    except DatabaseError:
+        _devolver(pendientes)
+        return 0
+    return len(pendientes)
+
+
+def _volcar_fila_a_fila(filas):
+    """Inserta `filas` de una en una y descarta solo las que violan una restricción"""
+    insertadas = 0
+    for posicion, fila in enumerate(filas):
+        try:
+            with transaction.atomic():
+                fila.save(force_insert=True)
+        except IntegrityError:
+            logger.error(
+                'Transición descartada del historial: vehículo %s, %s -> %s (%s)',
+                fila.vehiculo_id, fila.estado_anterior, fila.estado_nuevo, fila.causa,
+                exc_info=True,
+            )
+        except DatabaseError:
+            _devolver(filas[posicion:])
+            break
+        else:
+            insertadas += 1
+    return insertadas
+
+
+def _devolver(filas):
+    logger.exception('No se ha podido volcar el historial: %d transiciones se reintentarán', len(filas))
+    pendientes = filas + _pendientes()
+    sobrantes = len(pendientes) - MAXIMO_PENDIENTES
+    if sobrantes > 0:
+        logger.warning(
+            'Buffer del historial lleno: se descartan las %d transiciones más antiguas', sobrantes
+        )
+        pendientes = pendientes[sobrantes:]
+    _local.pendientes = pendientes
+
+
+def finalizar_peticion(**kwargs):
+    """Receptor de request_finished: vuelca el buffer fuera del camino de la respuesta"""
+    try:
+        volcar()
+    except Exception:
+        # La respuesta ya se ha enviado: no hay a quién devolver el error
+        logger.exception('Error al volcar el historial de estados')
+    finally:
+        _local.request = None
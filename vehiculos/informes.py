@@ -0,0 +1,83 @@
+"""
+Informes entre talleres.
+
+Cada taller es una partición (índices que empiezan por taller), así que el
+resumen de la red no se calcula con un GROUP BY sobre toda la flota sino
+con las consultas de cada taller, lanzadas en paralelo en un pool de hilos
+(INFORMES_HILOS). Cada hilo abre su propia conexión y la cierra al acabar.
+
+Uso:
+    from vehiculos.informes import resumen_por_taller
+    for fila in resumen_por_taller():
+        print(fila.nombre, fila.vehiculos, fila.asignaciones_activas)
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count, F, Q, Sum
+
+from .models import Asignacion, EstadoVehiculo, Taller, Vehiculo
+
+ResumenTaller = namedtuple('ResumenTaller', [
+    'taller_id', 'codigo', 'nombre',
+    'vehiculos', 'disponibles', 'en_uso', 'baja',
+    'asignaciones_activas', 'km_recorridos',
+])
+
+
+def _resumen_taller(taller, alias):
+    vehiculos = Vehiculo.objects.using(alias).del_taller(taller.id).aggregate(
+        total=Count('id'),
+        disponibles=Count('id', filter=Q(estado=EstadoVehiculo.DISPONIBLE)),
+        en_uso=Count('id', filter=Q(estado=EstadoVehiculo.EN_USO)),
+        baja=Count('id', filter=Q(estado=EstadoVehiculo.BAJA)),
+    )
+    asignaciones = Asignacion.objects.using(alias).del_taller(taller.id).aggregate(
+        activas=Count('id', filter=Q(activa=True)),
+        km=Sum(
+            F('kilometraje_entrada') - F('kilometraje_salida'),
+            filter=Q(kilometraje_entrada__isnull=False),
+        ),
+    )
+    return ResumenTaller(
+        taller_id=taller.id,
+        codigo=taller.codigo,
+        nombre=taller.nombre,
+        vehiculos=vehiculos['total'],
+        disponibles=vehiculos['disponibles'],
+        en_uso=vehiculos['en_uso'],
+        baja=vehiculos['baja'],
+        asignaciones_activas=asignaciones['activas'],
+        km_recorridos=max(asignaciones['km'] or 0, 0),
+    )
+
+
+def _resumen_en_hilo(taller, alias):
+    try:
+        return _resumen_taller(taller, alias)
+    finally:
+        # Las conexiones son por hilo: sin cerrarlas quedarían abiertas
+        connections.close_all()
+
+
+def resumen_por_taller(taller_id=None):
+    """
+    Lista de ResumenTaller, uno por taller (o solo `taller_id`), en el
+    orden de Taller.
+    """
+    # El router (réplica) decide por hilo: se resuelve aquí y se pasa fijo
+    alias = router.db_for_read(Vehiculo)
+    talleres = Taller.objects.using(alias).all()
+    if taller_id is not None:
+        talleres = talleres.filter(id=taller_id)
+    talleres = list(talleres)
+
+    hilos = min(settings.INFORMES_HILOS, len(talleres))
+    # Una base de datos en memoria no se comparte entre conexiones
+    if hilos <= 1 or connections[alias].vendor == 'sqlite' and connections[alias].is_in_memory_db():
+        return [_resumen_taller(taller, alias) for taller in talleres]
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        return list(pool.map(lambda taller: _resumen_en_hilo(taller, alias), talleres))
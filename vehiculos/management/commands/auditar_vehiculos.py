@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from vehiculos import auditoria, historial
+from vehiculos.models import Taller, Vehiculo
+
+
+class Command(BaseCommand):
+    """
+    Busca vehículos cuyo estado o kilometraje no cuadra con sus asignaciones
+    (vehiculos/auditoria.py) y, con --reparar, los corrige en bloque.
+
+    Uso:
+        python manage.py auditar_vehiculos
+        python manage.py auditar_vehiculos --taller=PRINCIPAL --reparar
+    """
+
+    help = 'Audita la coherencia entre vehículos y asignaciones y opcionalmente la repara'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taller', help='Código del taller a auditar (default: todos)')
+        parser.add_argument('--muestra', type=int, default=10, help='Vehículos a listar por comprobación (default: 10)')
+        parser.add_argument(
+            '--reparar',
+            action='store_true',
+            help='Corrige las incoherencias. Sin este flag, solo las muestra'
+        )
+
+    def handle(self, *args, **options):
+        vehiculos = Vehiculo.objects.all()
+        if options['taller']:
+            try:
+                taller = Taller.objects.get(codigo=options['taller'])
+            except Taller.DoesNotExist:
+                raise CommandError(f"No existe el taller {options['taller']}")
+            vehiculos = vehiculos.del_taller(taller.id)
+
+        comprobaciones = auditoria.auditar(vehiculos, muestra=options['muestra'])
+        total = sum(comprobacion.total for comprobacion in comprobaciones)
+        if total == 0:
+            self.stdout.write(self.style.SUCCESS('✅ Vehículos y asignaciones coherentes'))
+            return
+
+        for comprobacion in comprobaciones:
+            if not comprobacion.total:
+                continue
+            self.stdout.write(self.style.WARNING(f'⚠️  {comprobacion.titulo}: {comprobacion.total}'))
+            for _, matricula, estado, kilometraje, km_entrada in comprobacion.muestra:
+                entrada = f', última entrada {km_entrada} km' if km_entrada is not None else ''
+                self.stdout.write(f'   - {matricula} ({estado}, {kilometraje} km{entrada})')
+            if comprobacion.total > len(comprobacion.muestra):
+                self.stdout.write(f'   ... y {comprobacion.total - len(comprobacion.muestra)} más')
+
+        if not options['reparar']:
+            self.stdout.write(self.style.WARNING('\n⚠️  Usa --reparar para corregirlas'))
+            return
+
+        reparados = auditoria.reparar(vehiculos)
+        # Fuera de una petición el historial no se vuelca solo
+        historial.volcar()
+        for clave, titulo, _ in auditoria.COMPROBACIONES:
+            self.stdout.write(self.style.SUCCESS(f'✅ {titulo}: {reparados[clave]} corregido(s)'))
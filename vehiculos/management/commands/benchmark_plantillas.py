@@ -0,0 +1,117 @@
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.backends.jinja2 import Jinja2
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from vehiculos.models import Vehiculo, Asignacion, EstadoVehiculo
+
+ESTADOS = [EstadoVehiculo.DISPONIBLE, EstadoVehiculo.EN_USO, EstadoVehiculo.BAJA]
+
+
+def _normalizar(html):
+    return re.sub(r'\s+', ' ', html).strip()
+
+
+class Command(BaseCommand):
+    """
+    Compara el tiempo de render de las plantillas de Django y de Jinja2 para
+    el dashboard y los listados con N filas en memoria (no usa la BD).
+    
+    Uso:
+        python manage.py benchmark_plantillas
+        python manage.py benchmark_plantillas --filas 1000 10000 --repeticiones 5
+    """
+    
+    help = 'Mide el render de los listados con el motor de Django y con Jinja2'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[1000, 10000], help='Tamaños a medir (default: 1000 10000)')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Renders por medida, se toma el mejor (default: 3)')
+
+    def handle(self, *args, **options):
+        django_engine = engines['django']
+        parametros = {k: v for k, v in settings.JINJA2_TEMPLATES.items() if k != 'BACKEND'}
+        jinja_engine = Jinja2({**parametros, 'NAME': 'jinja2'})
+        factory = RequestFactory()
+        
+        self.stdout.write(f"{'Página':<26}{'Filas':>8}{'Django (ms)':>14}{'Jinja2 (ms)':>14}{'Mejora':>9}")
+        for filas in options['filas']:
+            for plantilla, url, contexto in self._paginas(filas):
+                request = factory.get(url)
+                request.user = User(username='benchmark')
+                request.resolver_match = resolve(url)
+                
+                tiempos = []
+                salidas = []
+                for engine in (django_engine, jinja_engine):
+                    template = engine.get_template(plantilla)
+                    mejor = None
+                    for _ in range(options['repeticiones']):
+                        inicio = time.perf_counter()
+                        html = template.render(contexto, request)
+                        duracion = time.perf_counter() - inicio
+                        mejor = duracion if mejor is None else min(mejor, duracion)
+                    tiempos.append(mejor)
+                    salidas.append(_normalizar(html))
+                
+                self.stdout.write(
+                    f'{plantilla.split("/")[-1]:<26}{filas:>8}{tiempos[0] * 1000:>14.1f}'
+                    f'{tiempos[1] * 1000:>14.1f}{tiempos[0] / tiempos[1]:>8.1f}x'
+                )
+                if salidas[0] != salidas[1]:
+                    self.stdout.write(self.style.WARNING(f'   ⚠️  El HTML de {plantilla} difiere entre motores'))
+
+    def _paginas(self, filas):
+        ahora = timezone.now()
+        vehiculos = [
+            Vehiculo(
+                id=i,
+                matricula=f'{i % 10000:04d}ABC',
+                marca='Seat',
+                modelo='Ibiza',
+                color='Rojo',
+                año=2015 + i % 10,
+                estado=ESTADOS[i % 3],
+                kilometraje=i * 37,
+            )
+            for i in range(1, filas + 1)
+        ]
+        asignaciones = [
+            Asignacion(
+                id=i,
+                vehiculo=vehiculos[i - 1],
+                cliente=f'Cliente {i}',
+                fecha_inicio=ahora - timedelta(hours=i),
+                fecha_fin=None if i % 2 else ahora - timedelta(minutes=i),
+                kilometraje_salida=i * 10,
+                kilometraje_entrada=None if i % 2 else i * 10 + 150,
+                motivo='Revisión',
+                activa=bool(i % 2),
+            )
+            for i in range(1, filas + 1)
+        ]
+        
+        yield 'vehiculos/dashboard.html', reverse('vehiculos:dashboard'), {
+            'total_vehiculos': filas,
+            'disponibles': filas // 3,
+            'en_uso': filas // 3,
+            'vehiculos': vehiculos,
+            'asignaciones_activas': asignaciones[:5],
+        }
+        yield 'vehiculos/lista_vehiculos.html', reverse('vehiculos:lista_vehiculos'), {
+            'vehiculos': vehiculos,
+            'estado_filtro': '',
+            'estados': EstadoVehiculo.choices,
+        }
+        yield 'vehiculos/lista_asignaciones.html', reverse('vehiculos:lista_asignaciones'), {
+            'asignaciones': asignaciones,
+            'filtro': 'todas',
+        }
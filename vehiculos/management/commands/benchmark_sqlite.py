@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction, OperationalError
+
+
+PERFILES = {
+    'basico': 'django.db.backends.sqlite3',
+    'optimizado': 'gescoches.sqlite',
+}
+
+
+class Command(BaseCommand):
+    """
+    Benchmark de escrituras y lecturas concurrentes sobre SQLite.
+
+    Compara el SQLite por defecto de Django con el perfil optimizado de
+    gescoches/sqlite (WAL + PRAGMAs + BEGIN IMMEDIATE) usando una base de
+    datos temporal, sin tocar la del proyecto.
+
+    Cada escritor ejecuta transacciones que leen y luego escriben (como un
+    get() seguido de save()), que es el caso que da "database is locked".
+
+    Uso:
+        python manage.py benchmark_sqlite
+        python manage.py benchmark_sqlite --escritores=8 --lectores=8 --segundos=10
+    """
+
+    help = 'Mide el rendimiento de SQLite con escrituras y lecturas concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=4, help='Hilos escritores (default: 4)')
+        parser.add_argument('--lectores', type=int, default=4, help='Hilos lectores (default: 4)')
+        parser.add_argument('--segundos', type=float, default=5, help='Duración de cada perfil (default: 5)')
+        parser.add_argument('--filas', type=int, default=20000, help='Filas iniciales de la tabla (default: 20000)')
+
+    def handle(self, *args, **options):
+        directorio = tempfile.mkdtemp(prefix='gescoches-bench-')
+        resultados = {}
+        try:
+            for perfil, engine in PERFILES.items():
+                alias = f'bench_{perfil}'
+                self._configurar(alias, engine, os.path.join(directorio, f'{perfil}.sqlite3'))
+                self._preparar(alias, options['filas'])
+                resultados[perfil] = self._medir(alias, options)
+                connections[alias].close()
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        self.stdout.write(
+            f"\n{'Perfil':<12}{'Escrituras/s':>14}{'Lecturas/s':>14}{'Bloqueos':>10}"
+        )
+        for perfil, (escrituras, lecturas, errores, segundos) in resultados.items():
+            self.stdout.write(
+                f'{perfil:<12}{escrituras / segundos:>14.0f}{lecturas / segundos:>14.0f}{errores:>10}'
+            )
+
+        basico, optimizado = resultados['basico'], resultados['optimizado']
+        for indice, nombre in ((0, 'Escrituras'), (1, 'Lecturas')):
+            if basico[indice]:
+                mejora = (optimizado[indice] / optimizado[3]) / (basico[indice] / basico[3])
+                self.stdout.write(self.style.SUCCESS(f'✅ {nombre}: x{mejora:.1f} con el perfil optimizado'))
+
+    def _configurar(self, alias, engine, nombre):
+        bases = connections.configure_settings({
+            'default': connections.settings['default'],
+            alias: {'ENGINE': engine, 'NAME': nombre},
+        })
+        connections.settings[alias] = bases[alias]
+
+    def _preparar(self, alias, filas):
+        with connections[alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE bench (id INTEGER PRIMARY KEY, contador INTEGER, texto TEXT)')
+            cursor.executemany(
+                'INSERT INTO bench (contador, texto) VALUES (%s, %s)',
+                [(0, f'fila {i}') for i in range(filas)],
+            )
+
+    def _medir(self, alias, options):
+        fin = time.perf_counter() + options['segundos']
+        contadores = {'escrituras': 0, 'lecturas': 0, 'errores': 0}
+        lock = threading.Lock()
+
+        def sumar(clave):
+            with lock:
+                contadores[clave] += 1
+
+        def escritor():
+            try:
+                while time.perf_counter() < fin:
+                    try:
+                        with transaction.atomic(using=alias):
+                            with connections[alias].cursor() as cursor:
+                                cursor.execute('SELECT MAX(id) FROM bench')
+                                ultimo = cursor.fetchone()[0]
+                                cursor.execute('UPDATE bench SET contador = contador + 1 WHERE id = %s', [ultimo])
+                                cursor.execute('INSERT INTO bench (contador, texto) VALUES (%s, %s)', [0, 'nueva'])
+                        sumar('escrituras')
+                    except OperationalError as error:
+                        if 'locked' not in str(error):
+                            raise
+                        sumar('errores')
+            finally:
+                connections[alias].close()
+
+        def lector():
+            try:
+                while time.perf_counter() < fin:
+                    try:
+                        with connections[alias].cursor() as cursor:
+                            cursor.execute('SELECT COUNT(*), SUM(contador) FROM bench WHERE id % 7 = 0')
+                            cursor.fetchone()
+                        sumar('lecturas')
+                    except OperationalError as error:
+                        if 'locked' not in str(error):
+                            raise
+                        sumar('errores')
+            finally:
+                connections[alias].close()
+
+        hilos = [threading.Thread(target=escritor) for _ in range(options['escritores'])]
+        hilos += [threading.Thread(target=lector) for _ in range(options['lectores'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        return contadores['escrituras'], contadores['lecturas'], contadores['errores'], segundos
@@ -0,0 +1,85 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from vehiculos import tareas
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Runner de tareas periódicas (limpieza, resumen de flota...).
+    
+    Se puede lanzar en varias instancias a la vez: cada tarea tiene un lease
+    en base de datos y solo la ejecuta un proceso.
+    
+    En modo continuo un error fuera de las tareas (BD caída, SQLite
+    bloqueado al tomar el lease...) no para el runner: se registra, se
+    descartan las conexiones rotas y se reintenta en la siguiente pasada.
+    
+    Uso:
+        python manage.py ejecutar_tareas                   # bucle continuo
+        python manage.py ejecutar_tareas --una-vez         # una pasada (cron)
+        python manage.py ejecutar_tareas --una-vez --forzar --tarea=resumen_flota
+    """
+    
+    help = 'Ejecuta las tareas periódicas registradas en vehiculos/tareas.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Hace una sola pasada y termina'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=60,
+            help='Segundos entre pasadas en modo continuo (default: 60)'
+        )
+        parser.add_argument(
+            '--tarea',
+            action='append',
+            help='Ejecuta solo esta tarea (se puede repetir)'
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Ejecuta aunque no toque todavía (respeta el lease)'
+        )
+
+    def handle(self, *args, **options):
+        nombres = options['tarea']
+        registradas = [tarea.nombre for tarea in tareas.tareas_registradas()]
+        self.stdout.write(f'Tareas registradas: {", ".join(registradas)} ({tareas.IDENTIFICADOR})')
+        
+        while True:
+            try:
+                self._pasada(nombres, options['forzar'])
+            except Exception:
+                if options['una_vez']:
+                    raise
+                logger.exception('Error en la pasada del runner de tareas')
+                self.stderr.write(self.style.ERROR(
+                    f'❌ Error en la pasada, se reintenta en {options["intervalo"]}s'
+                ))
+                close_old_connections()
+            
+            if options['una_vez']:
+                return
+            time.sleep(options['intervalo'])
+
+    def _pasada(self, nombres, forzar):
+        close_old_connections()
+        for ejecucion in tareas.ejecutar_pendientes(nombres, forzar):
+            if ejecucion.exito:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✅ {ejecucion.tarea}: {ejecucion.filas} fila(s) en {ejecucion.duracion:.2f}s'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f'❌ {ejecucion.tarea} falló en {ejecucion.duracion:.2f}s\n{ejecucion.error}'
+                ))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from vehiculos.models import Asignacion
+from vehiculos.sincronizacion import borrar_con_lapidas
 
 
 class Command(BaseCommand):
@@ -88,8 +89,8 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Operación cancelada'))
             return
         
-        # Ejecutar la eliminación
-        asignaciones_a_eliminar.delete()
+        # Ejecutar la eliminación (dejando lápidas para la sincronización)
+        borrar_con_lapidas(asignaciones_a_eliminar)
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Se ejecuta en un proceso nuevo con -X importtime para medir un arranque en frío
+SCRIPT_ARRANQUE = '''
+import json, os, time
+t0 = time.perf_counter()
+import django
+t1 = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gescoches.settings')
+from django.conf import settings
+settings.INSTALLED_APPS
+t2 = time.perf_counter()
+django.setup()
+t3 = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+t4 = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+t5 = time.perf_counter()
+print(json.dumps([
+    ['import django', t1 - t0],
+    ['settings', t2 - t1],
+    ['django.setup() (apps, modelos, admin)', t3 - t2],
+    ['aplicación WSGI (middleware)', t4 - t3],
+    ['URLconf y vistas', t5 - t4],
+]))
+'''
+
+
+class Command(BaseCommand):
+    """
+    Mide el arranque en frío de la aplicación: tiempo de cada fase y tiempo
+    de importación por paquete (python -X importtime) en un proceso nuevo.
+    
+    Uso:
+        python manage.py medir_arranque
+        python manage.py medir_arranque --top=25
+    """
+    
+    help = 'Informa del tiempo de importación y de setup de Django por fase y por módulo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help='Número de paquetes/módulos a mostrar (default: 15)'
+        )
+
+    def handle(self, *args, **options):
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT_ARRANQUE],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        if proceso.returncode != 0:
+            self.stderr.write(proceso.stderr)
+            return
+        
+        fases = json.loads(proceso.stdout.strip().splitlines()[-1])
+        por_paquete = defaultdict(int)
+        por_modulo = []
+        for linea in proceso.stderr.splitlines():
+            if not linea.startswith('import time:') or 'self [us]' in linea:
+                continue
+            propio, acumulado, modulo = linea[len('import time:'):].split('|')
+            modulo = modulo.strip()
+            por_paquete[modulo.split('.')[0]] += int(propio)
+            por_modulo.append((int(acumulado), modulo))
+        
+        total = sum(segundos for _, segundos in fases)
+        self.stdout.write(self.style.SUCCESS(f'Arranque en frío: {total * 1000:.0f} ms'))
+        for fase, segundos in fases:
+            self.stdout.write(f'   {fase:<40}{segundos * 1000:>8.0f} ms')
+        
+        self.stdout.write(f'\nImportación por paquete (tiempo propio, top {options["top"]}):')
+        for paquete, microsegundos in sorted(por_paquete.items(), key=lambda p: -p[1])[:options['top']]:
+            self.stdout.write(f'   {paquete:<40}{microsegundos / 1000:>8.1f} ms')
+        
+        propios = [m for m in por_modulo if m[1].split('.')[0] in ('gescoches', 'vehiculos')]
+        self.stdout.write('\nMódulos del proyecto (tiempo acumulado):')
+        for microsegundos, modulo in sorted(propios, reverse=True)[:options['top']]:
+            self.stdout.write(f'   {modulo:<40}{microsegundos / 1000:>8.1f} ms')
@@ -0,0 +1,206 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.shortcuts import render
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from vehiculos import filas as filas_ligeras, views
+from vehiculos.models import Asignacion, EstadoVehiculo, Taller, Vehiculo
+
+ESTADOS = [EstadoVehiculo.DISPONIBLE, EstadoVehiculo.EN_USO, EstadoVehiculo.BAJA]
+LETRAS = 'BCDFGHJKLMNPRSTVWXYZ'
+
+
+def _matricula(i):
+    letras = ''.join(LETRAS[(i // 10000) // len(LETRAS) ** n % len(LETRAS)] for n in range(3))
+    return f'{i % 10000:04d}{letras}'
+
+
+def crear_datos(filas):
+    """N vehículos y N asignaciones de un taller nuevo, con bulk_create. Devuelve el taller."""
+    taller = Taller.objects.create(codigo='MEDICION', nombre='Medición de memoria')
+    Vehiculo.objects.bulk_create(
+        (
+            Vehiculo(
+                taller=taller,
+                matricula=_matricula(i),
+                marca='Seat',
+                modelo='Ibiza',
+                color='Rojo',
+                año=2015 + i % 10,
+                estado=ESTADOS[i % 3],
+                kilometraje=i % 200000,
+            )
+            for i in range(filas)
+        ),
+        batch_size=2000,
+    )
+    ahora = timezone.now()
+    ids = list(Vehiculo.objects.filter(taller=taller).values_list('id', flat=True))
+    Asignacion.objects.bulk_create(
+        (
+            Asignacion(
+                vehiculo_id=vehiculo_id,
+                taller=taller,
+                cliente=f'Cliente {i}',
+                fecha_inicio=ahora - timedelta(hours=i),
+                fecha_fin=None if i % 2 else ahora - timedelta(minutes=i),
+                kilometraje_salida=i % 200000,
+                kilometraje_entrada=None if i % 2 else i % 200000 + 150,
+                motivo='Revisión',
+                activa=bool(i % 2),
+            )
+            for i, vehiculo_id in enumerate(ids)
+        ),
+        batch_size=2000,
+    )
+    return taller
+
+
+# Contextos como los construían las vistas antes de vehiculos/filas.py (instancias de modelo)
+
+def _dashboard_modelos(request):
+    return 'vehiculos/dashboard.html', {
+        'total_vehiculos': Vehiculo.objects.count(),
+        'disponibles': Vehiculo.objects.filter(estado=EstadoVehiculo.DISPONIBLE).count(),
+        'en_uso': Vehiculo.objects.filter(estado=EstadoVehiculo.EN_USO).count(),
+        'vehiculos': Vehiculo.objects.all().order_by('estado', 'matricula'),
+        'asignaciones_activas': Asignacion.objects.filter(activa=True).select_related('vehiculo')[:5],
+    }
+
+
+def _lista_vehiculos_modelos(request):
+    return 'vehiculos/lista_vehiculos.html', {
+        'vehiculos': Vehiculo.objects.all(),
+        'estado_filtro': '',
+        'estados': EstadoVehiculo.choices,
+    }
+
+
+def _lista_asignaciones_modelos(request):
+    return 'vehiculos/lista_asignaciones.html', {
+        'asignaciones': Asignacion.objects.all().select_related('vehiculo'),
+        'filtro': 'todas',
+    }
+
+
+# Solo los datos del listado principal: (nombre, con modelos, con filas ligeras)
+DATOS = [
+    ('vehiculos',
+     lambda: list(Vehiculo.objects.order_by('estado', 'matricula')),
+     lambda: filas_ligeras.filas_vehiculos(Vehiculo.objects.order_by('estado', 'matricula'))),
+    ('asignaciones',
+     lambda: list(Asignacion.objects.select_related('vehiculo')),
+     lambda: filas_ligeras.filas_asignaciones(Asignacion.objects.all())),
+]
+
+# (nombre, url, query string, contexto con modelos, vista actual)
+PAGINAS = [
+    ('dashboard', 'vehiculos:dashboard', '', _dashboard_modelos, views.dashboard),
+    ('lista_vehiculos', 'vehiculos:lista_vehiculos', '', _lista_vehiculos_modelos, views.lista_vehiculos),
+    ('lista_asignaciones', 'vehiculos:lista_asignaciones', '?filtro=todas',
+     _lista_asignaciones_modelos, views.lista_asignaciones),
+]
+
+
+class Command(BaseCommand):
+    """
+    Pico de memoria por petición de los listados, con instancias de modelo
+    ("antes") y con las filas ligeras de vehiculos/filas.py ("después").
+
+    Crea N vehículos y N asignaciones dentro de una transacción que se
+    deshace al terminar (no deja datos). El pico se mide con tracemalloc:
+    primero solo la carga de los datos del listado y después la petición
+    completa (consulta, filas y HTML renderizado).
+
+    Uso:
+        python manage.py medir_memoria_listados
+        python manage.py medir_memoria_listados --filas=10000
+    """
+
+    help = 'Mide el pico de memoria por petición de los listados con modelos y con filas ligeras'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100000, help='Vehículos y asignaciones a crear (default: 100000)')
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        factory = RequestFactory()
+        usuario = User(username='medicion', is_staff=True)
+
+        with transaction.atomic():
+            self.stdout.write(f'Creando {filas} vehículos y {filas} asignaciones (se deshace al terminar)...')
+            crear_datos(filas)
+
+            self.stdout.write(
+                f"\n{'Datos':<22}{'Filas':>8}{'Antes (MB)':>12}{'Después (MB)':>14}{'Reducción':>11}"
+                f"{'Antes (s)':>11}{'Después (s)':>13}"
+            )
+            for nombre, con_modelos, con_filas in DATOS:
+                antes = self._medir_funcion(con_modelos)
+                despues = self._medir_funcion(con_filas)
+                self._fila(nombre, filas, antes, despues)
+
+            self.stdout.write(
+                f"\n{'Página':<22}{'Filas':>8}{'Antes (MB)':>12}{'Después (MB)':>14}{'Reducción':>11}"
+                f"{'Antes (s)':>11}{'Después (s)':>13}"
+            )
+            for nombre, url_name, query, contexto_modelos, vista in PAGINAS:
+                url = reverse(url_name) + query
+
+                def peticion_modelos(request):
+                    plantilla, contexto = contexto_modelos(request)
+                    return render(request, plantilla, contexto, using=settings.MOTOR_PLANTILLAS)
+
+                # Primera pasada sin medir: compila plantillas y calienta cachés
+                for peticion in (peticion_modelos, vista):
+                    self._medir(peticion, factory, url, usuario)
+                antes = self._medir(peticion_modelos, factory, url, usuario)
+                despues = self._medir(vista, factory, url, usuario)
+                self._fila(nombre, filas, antes, despues)
+
+            transaction.set_rollback(True)
+
+    def _fila(self, nombre, filas, antes, despues):
+        self.stdout.write(
+            f'{nombre:<22}{filas:>8}{antes[0]:>12.1f}{despues[0]:>14.1f}'
+            f'{antes[0] / despues[0]:>10.1f}x{antes[1]:>11.2f}{despues[1]:>13.2f}'
+        )
+
+    def _medir_funcion(self, funcion):
+        """(pico en MB, segundos) de llamar a `funcion`"""
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del resultado
+        return pico / 1024 / 1024, segundos
+
+    def _medir(self, vista, factory, url, usuario):
+        """(pico en MB, segundos) de una petición"""
+        request = factory.get(url)
+        request.user = usuario
+        request.resolver_match = resolve(url.split('?')[0])
+
+        respuesta = None
+
+        def peticion():
+            nonlocal respuesta
+            respuesta = vista(request)
+            if respuesta.streaming:
+                # Listados en streaming: la memoria que cuenta es la de enviar todas las partes
+                for _ in respuesta.streaming_content:
+                    pass
+
+        medida = self._medir_funcion(peticion)
+        assert respuesta.status_code == 200, respuesta.status_code
+        return medida
@@ -0,0 +1,90 @@
+import time
+import zlib
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .medir_memoria_listados import crear_datos
+
+PAGINAS = [
+    ('vehiculos:lista_vehiculos', ''),
+    ('vehiculos:lista_asignaciones', '?filtro=todas'),
+]
+
+# (nombre, LISTADOS_STREAMING, Accept-Encoding)
+MODOS = [
+    ('completo', False, ''),
+    ('completo + gzip', False, 'gzip'),
+    ('streaming', True, ''),
+    ('streaming + gzip', True, 'gzip'),
+]
+
+
+class Command(BaseCommand):
+    """
+    Tiempo hasta el primer byte, tiempo total y bytes enviados de los
+    listados, renderizados enteros ("completo") y en streaming
+    (vehiculos/streaming.py), con y sin gzip.
+
+    Crea N vehículos y N asignaciones dentro de una transacción que se
+    deshace al terminar (no deja datos). Las peticiones pasan por todo el
+    stack de middleware con el cliente de pruebas. "Primer byte" es el
+    momento en que sale el primer trozo de HTML (con gzip, el primero que ya
+    se puede descomprimir); con la página completa coincide con el total.
+
+    Uso:
+        python manage.py medir_streaming
+        python manage.py medir_streaming --filas=10000
+    """
+
+    help = 'Mide primer byte, tiempo total y bytes de los listados completos y en streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100000, help='Vehículos y asignaciones a crear (default: 100000)')
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            self.stdout.write(f'Creando {filas} vehículos y {filas} asignaciones (se deshace al terminar)...')
+            crear_datos(filas)
+            cliente = Client()
+            cliente.force_login(User.objects.create_superuser('medicion', 'medicion@gescoches.local', None))
+
+            self.stdout.write(
+                f"\n{'Página':<34}{'Modo':<18}{'Primer byte (ms)':>18}{'Total (ms)':>12}{'Bytes':>12}"
+            )
+            for url_name, query in PAGINAS:
+                url = reverse(url_name) + query
+                for nombre, en_streaming, codificacion in MODOS:
+                    with override_settings(LISTADOS_STREAMING=en_streaming):
+                        # Primera pasada sin medir: compila plantillas y calienta cachés
+                        self._medir(cliente, url, codificacion)
+                        primer_byte, total, enviados = self._medir(cliente, url, codificacion)
+                    self.stdout.write(
+                        f'{url:<34}{nombre:<18}{primer_byte * 1000:>18.0f}{total * 1000:>12.0f}{enviados:>12}'
+                    )
+
+            transaction.set_rollback(True)
+
+    def _medir(self, cliente, url, codificacion):
+        """(segundos hasta el primer byte de HTML, segundos en total, bytes enviados)"""
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url, HTTP_ACCEPT_ENCODING=codificacion)
+        assert respuesta.status_code == 200, respuesta.status_code
+
+        if not respuesta.streaming:
+            total = time.perf_counter() - inicio
+            return total, total, len(respuesta.content)
+
+        descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS) if respuesta.get('Content-Encoding') == 'gzip' else None
+        primer_byte = None
+        enviados = 0
+        for parte in respuesta.streaming_content:
+            enviados += len(parte)
+            if primer_byte is None and (descompresor.decompress(parte) if descompresor else parte):
+                primer_byte = time.perf_counter() - inicio
+        return primer_byte, time.perf_counter() - inicio, enviados
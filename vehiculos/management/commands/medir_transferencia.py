@@ -0,0 +1,109 @@
+import gzip
+
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.templatetags.static import static
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from gescoches.storage import CSS_ORIGEN
+from vehiculos.templatetags.estaticos import _leer_css_critico, css_critico
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGINAS = [
+    'vehiculos:dashboard',
+    'vehiculos:lista_vehiculos',
+    'vehiculos:lista_asignaciones',
+]
+
+
+def _contenido(respuesta):
+    if respuesta.streaming:
+        return b''.join(respuesta.streaming_content)
+    return respuesta.content
+
+
+def _comprimido(contenido):
+    if brotli is not None:
+        return len(brotli.compress(contenido))
+    return len(gzip.compress(contenido))
+
+
+class Command(BaseCommand):
+    """
+    Bytes transferidos por página antes y después del CSS crítico.
+    
+    "Antes" es el <link rel="stylesheet"> bloqueante de siempre y "después"
+    el CSS crítico incrustado con la hoja completa cargada en diferido.
+    Los tamaños son comprimidos (Brotli si está instalado, si no gzip),
+    como los sirve WhiteNoise. Comprueba que el CSS crítico se incrusta tal
+    cual (sin escapar) y, si ya se ha ejecutado collectstatic, las
+    cabeceras con las que se sirve styles.css.
+    
+    Uso:
+        python manage.py medir_transferencia
+    """
+    
+    help = 'Informa de los bytes transferidos por página antes y después del CSS crítico'
+
+    def handle(self, *args, **options):
+        usuario = User.objects.filter(is_superuser=True).first()
+        if usuario is None:
+            raise CommandError('Hace falta un superuser (python create_admin.py)')
+        
+        with open(finders.find(CSS_ORIGEN), 'rb') as fichero:
+            css = _comprimido(fichero.read())
+        
+        compresion = 'br' if brotli is not None else 'gzip'
+        self.stdout.write(f'styles.css ({compresion}): {css} bytes\n')
+        self.stdout.write(
+            f"{'Página':<32}{'Total antes':>13}{'Total después':>15}{'Bloqueante antes':>18}{'Bloqueante después':>20}"
+        )
+        
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            cliente = Client()
+            cliente.force_login(usuario)
+            
+            for pagina in PAGINAS:
+                url = reverse(pagina)
+                with override_settings(CSS_CRITICO_INLINE=False):
+                    antes = _comprimido(_contenido(cliente.get(url)))
+                despues = _comprimido(_contenido(cliente.get(url)))
+                # Antes: HTML + styles.css bloquean el primer render.
+                # Después: solo el HTML; styles.css llega en diferido.
+                self.stdout.write(
+                    f'{url:<32}{antes + css:>13}{despues + css:>15}{antes + css:>18}{despues:>20}'
+                )
+            
+            self._comprobar_css_critico(cliente)
+            self._comprobar_cabeceras(cliente)
+
+    def _comprobar_css_critico(self, cliente):
+        css = _leer_css_critico()
+        pagina = _contenido(cliente.get(reverse(PAGINAS[0]))).decode('utf-8')
+        if css in css_critico() and css in pagina:
+            self.stdout.write(self.style.SUCCESS('\n✅ CSS crítico incrustado byte a byte'))
+        else:
+            self.stdout.write(self.style.WARNING('\n⚠️  El CSS crítico de la página no coincide con styles.critico.css (¿escapado?)'))
+
+    def _comprobar_cabeceras(self, cliente):
+        try:
+            url = static(CSS_ORIGEN)
+        except ValueError:
+            self.stdout.write(self.style.WARNING('\n⚠️  Ejecuta collectstatic para comprobar las cabeceras'))
+            return
+        
+        respuesta = cliente.get(url, HTTP_ACCEPT_ENCODING='br, gzip')
+        cache_control = respuesta.get('Cache-Control', '')
+        self.stdout.write(f'\n{url}')
+        self.stdout.write(f'   Content-Encoding: {respuesta.get("Content-Encoding", "-")}')
+        self.stdout.write(f'   Cache-Control: {cache_control or "-"}')
+        if 'immutable' in cache_control:
+            self.stdout.write(self.style.SUCCESS('✅ Fichero con hash servido como immutable'))
+        else:
+            self.stdout.write(self.style.WARNING('⚠️  El fichero no se sirve como immutable'))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+class Command(BaseCommand):
+    """
+    Paso "release" del despliegue en un único proceso Django.
+    
+    Sustituye a `python manage.py migrate && python create_admin.py`, que
+    arrancaba Django dos veces y ejecutaba migrate aunque no hubiera nada
+    que migrar. Aquí se compara el grafo de migraciones con la tabla
+    django_migrations y solo se llama a migrate si hay migraciones
+    pendientes; después se crea el admin si no existe.
+    
+    Uso:
+        python manage.py preparar_despliegue
+        python manage.py preparar_despliegue --forzar-migrate
+    """
+    
+    help = 'Migra (solo si hay migraciones pendientes) y crea el admin si no existe'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar-migrate',
+            action='store_true',
+            help='Ejecuta migrate aunque no haya migraciones pendientes'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        
+        if plan or options['forzar_migrate']:
+            self.stdout.write(f'Aplicando {len(plan)} migración(es) pendiente(s)...')
+            call_command('migrate', interactive=False, verbosity=options['verbosity'])
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Sin migraciones pendientes, se omite migrate'))
+        
+        from create_admin import crear_admin
+        crear_admin()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Despliegue preparado en {time.perf_counter() - inicio:.2f}s')
+        )
@@ -0,0 +1,18 @@
+from . import historial
+
+
+class HistorialEstadosMiddleware:
+    """
+    Asocia la petición en curso al historial de estados para saber qué usuario
+    provoca cada transición. Debe ir después de AuthenticationMiddleware.
+
+    El volcado de las transiciones no se hace aquí sino en request_finished
+    (ver VehiculosConfig.ready), una vez enviada la respuesta.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        historial.iniciar_peticion(request)
+        return self.get_response(request)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 23:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('vehiculos', '0003_alter_vehiculo_estado_delete_mantenimiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(blank=True, choices=[('DISPONIBLE', 'Disponible'), ('EN_USO', 'En Uso'), ('BAJA', 'Dado de Baja')], max_length=15, verbose_name='Estado Anterior')),
+                ('estado_nuevo', models.CharField(choices=[('DISPONIBLE', 'Disponible'), ('EN_USO', 'En Uso'), ('BAJA', 'Dado de Baja')], max_length=15, verbose_name='Estado Nuevo')),
+                ('causa', models.CharField(choices=[('ALTA', 'Alta del vehículo'), ('EDICION', 'Edición manual'), ('ASIGNACION', 'Inicio de asignación'), ('FINALIZACION', 'Fin de asignación'), ('ACCION_MASIVA', 'Acción masiva del admin')], max_length=15, verbose_name='Causa')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+                ('vehiculo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios_estado', to='vehiculos.vehiculo', verbose_name='Vehículo')),
+            ],
+            options={
+                'verbose_name': 'Cambio de Estado',
+                'verbose_name_plural': 'Cambios de Estado',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['vehiculo', '-fecha'], name='cambio_vehiculo_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.9 on 2026-10-18 23:53
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0004_cambioestado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenFlota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('disponibles', models.PositiveIntegerField(default=0, verbose_name='Disponibles')),
+                ('en_uso', models.PositiveIntegerField(default=0, verbose_name='En Uso')),
+                ('baja', models.PositiveIntegerField(default=0, verbose_name='De Baja')),
+                ('asignaciones_iniciadas', models.PositiveIntegerField(default=0, verbose_name='Asignaciones Iniciadas')),
+                ('km_recorridos', models.PositiveIntegerField(default=0, verbose_name='Km Recorridos')),
+                ('actualizado', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Flota',
+                'verbose_name_plural': 'Resúmenes de Flota',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TareaProgramada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Nombre')),
+                ('proxima_ejecucion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima Ejecución')),
+                ('bloqueada_hasta', models.DateTimeField(blank=True, help_text='Fin del lease del proceso que la está ejecutando', null=True, verbose_name='Bloqueada Hasta')),
+                ('propietario', models.CharField(blank=True, help_text='host:pid del proceso con el lease', max_length=100, verbose_name='Propietario')),
+                ('fallos_consecutivos', models.PositiveIntegerField(default=0, verbose_name='Fallos Consecutivos')),
+            ],
+            options={
+                'verbose_name': 'Tarea Programada',
+                'verbose_name_plural': 'Tareas Programadas',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EjecucionTarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarea', models.CharField(max_length=50, verbose_name='Tarea')),
+                ('inicio', models.DateTimeField(verbose_name='Inicio')),
+                ('duracion', models.FloatField(verbose_name='Duración (s)')),
+                ('filas', models.PositiveIntegerField(default=0, verbose_name='Filas Afectadas')),
+                ('exito', models.BooleanField(default=True, verbose_name='Éxito')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+            options={
+                'verbose_name': 'Ejecución de Tarea',
+                'verbose_name_plural': 'Ejecuciones de Tareas',
+                'ordering': ['-inicio'],
+                'indexes': [models.Index(fields=['tarea', '-inicio'], name='ejecucion_tarea_inicio_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.9 on 2026-10-18 23:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0005_resumenflota_tareaprogramada_ejecuciontarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Borrado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=20, verbose_name='Modelo')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID')),
+                ('version', models.BigIntegerField(verbose_name='Versión')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Borrado',
+                'verbose_name_plural': 'Borrados',
+            },
+        ),
+        migrations.CreateModel(
+            name='SecuenciaSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Sincronización',
+            },
+        ),
+        migrations.AddField(
+            model_name='asignacion',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='vehiculo',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacion',
+            index=models.Index(fields=['version', 'id'], name='asignacion_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['version', 'id'], name='vehiculo_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrado',
+            index=models.Index(fields=['version', 'id'], name='borrado_version_idx'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.9 on 2026-10-19 00:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def asignar_taller_principal(apps, schema_editor):
+    """Los vehículos y asignaciones existentes pasan al taller PRINCIPAL"""
+    Taller = apps.get_model('vehiculos', 'Taller')
+    Vehiculo = apps.get_model('vehiculos', 'Vehiculo')
+    Asignacion = apps.get_model('vehiculos', 'Asignacion')
+    if not Vehiculo.objects.exists():
+        return
+    taller, _ = Taller.objects.get_or_create(codigo='PRINCIPAL', defaults={'nombre': 'Taller Principal'})
+    Vehiculo.objects.update(taller=taller)
+    Asignacion.objects.update(taller=taller)
+
+
+class Migration(migrations.Migration):
+
+    # En PostgreSQL los UPDATE de asignar_taller_principal dejan pendientes los
+    # triggers de las FK (DEFERRABLE INITIALLY DEFERRED) y el ALTER TABLE
+    # posterior falla en la misma transacción ("pending trigger events"). Sin
+    # transacción global cada operación se confirma por separado y el paso de
+    # datos va en su propia transacción (RunPython atomic=True).
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('vehiculos', '0006_borrado_secuenciasync_asignacion_version_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Taller',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=20, unique=True, verbose_name='Código')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+            ],
+            options={
+                'verbose_name': 'Taller',
+                'verbose_name_plural': 'Talleres',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PerfilUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Perfil de Usuario',
+                'verbose_name_plural': 'Perfiles de Usuario',
+            },
+        ),
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='taller',
+            field=models.ForeignKey(blank=True, help_text='Vacío = acceso a todos los talleres', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='usuarios', to='vehiculos.taller', verbose_name='Taller'),
+        ),
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='usuario',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='perfil', to=settings.AUTH_USER_MODEL, verbose_name='Usuario'),
+        ),
+        migrations.AddField(
+            model_name='borrado',
+            name='taller_id',
+            field=models.BigIntegerField(null=True, verbose_name='Taller'),
+        ),
+        migrations.AddField(
+            model_name='vehiculo',
+            name='taller',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='vehiculos', to='vehiculos.taller', verbose_name='Taller'),
+        ),
+        migrations.AddField(
+            model_name='asignacion',
+            name='taller',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='asignaciones', to='vehiculos.taller', verbose_name='Taller'),
+        ),
+        migrations.RunPython(asignar_taller_principal, migrations.RunPython.noop, atomic=True),
+        migrations.AlterField(
+            model_name='vehiculo',
+            name='taller',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='vehiculos', to='vehiculos.taller', verbose_name='Taller'),
+        ),
+        migrations.AlterField(
+            model_name='asignacion',
+            name='taller',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='asignaciones', to='vehiculos.taller', verbose_name='Taller'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['taller', 'estado', 'matricula'], name='vehiculo_taller_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacion',
+            index=models.Index(fields=['taller', 'activa', '-fecha_inicio'], name='asignacion_taller_activa_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.9 on 2026-10-19 00:46
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+import django.utils.timezone
+
+
+def calcular_disponible_desde(apps, schema_editor):
+    """Fin de la última asignación finalizada o, si no tiene, la fecha de alta"""
+    Vehiculo = apps.get_model('vehiculos', 'Vehiculo')
+    Asignacion = apps.get_model('vehiculos', 'Asignacion')
+    ultima_devolucion = (
+        Asignacion.objects.filter(vehiculo=OuterRef('pk'), fecha_fin__isnull=False)
+        .order_by()
+        .values('vehiculo')
+        .annotate(ultima=Max('fecha_fin'))
+        .values('ultima')
+    )
+    con_devolucion = Vehiculo.objects.filter(asignaciones__fecha_fin__isnull=False)
+    Vehiculo.objects.filter(pk__in=con_devolucion).update(disponible_desde=Subquery(ultima_devolucion))
+    sin_devolucion = Vehiculo.objects.exclude(pk__in=con_devolucion)
+    for fecha_alta in sin_devolucion.values_list('fecha_alta', flat=True).distinct().order_by():
+        sin_devolucion.filter(fecha_alta=fecha_alta).update(
+            disponible_desde=timezone.make_aware(datetime.combine(fecha_alta, time.min))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0007_talleres'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiculo',
+            name='disponible_desde',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Disponible desde'),
+        ),
+        migrations.RunPython(calcular_disponible_desde, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(condition=models.Q(('estado', 'DISPONIBLE')), fields=['taller', 'kilometraje', 'disponible_desde', 'id'], name='vehiculo_candidatos_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.9 on 2026-10-19 00:52
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+# Las mismas facetas que vehiculos.facetas.FACETAS
+FACETAS = [
+    ('vehiculo.marca', 'Vehiculo', F('marca'), str),
+    ('vehiculo.año', 'Vehiculo', F('año'), str),
+    ('asignacion.activa', 'Asignacion', F('activa'), lambda activa: '1' if activa else '0'),
+    ('asignacion.dia_inicio', 'Asignacion', TruncDate('fecha_inicio'), lambda dia: dia.isoformat()),
+]
+
+
+def calcular_contadores(apps, schema_editor):
+    """Contadores iniciales de los filtros del admin"""
+    ContadorFiltro = apps.get_model('vehiculos', 'ContadorFiltro')
+    contadores = []
+    for faceta, modelo, expresion, clave in FACETAS:
+        filas = (
+            apps.get_model('vehiculos', modelo).objects.order_by()
+            .annotate(valor_faceta=expresion)
+            .values('taller_id', 'valor_faceta')
+            .annotate(filas=Count('id'))
+            .values_list('taller_id', 'valor_faceta', 'filas')
+        )
+        contadores += [
+            ContadorFiltro(faceta=faceta, taller_id=taller_id, valor=clave(valor), total=total)
+            for taller_id, valor, total in filas
+        ]
+    ContadorFiltro.objects.bulk_create(contadores, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0008_disponible_desde'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorFiltro',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faceta', models.CharField(max_length=30, verbose_name='Faceta')),
+                ('valor', models.CharField(max_length=50, verbose_name='Valor')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('taller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='vehiculos.taller', verbose_name='Taller')),
+            ],
+            options={
+                'verbose_name': 'Contador de Filtro',
+                'verbose_name_plural': 'Contadores de Filtros',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contadorfiltro',
+            constraint=models.UniqueConstraint(fields=('faceta', 'taller', 'valor'), name='contador_filtro_unico'),
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
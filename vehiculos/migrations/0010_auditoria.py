@@ -0,0 +1,26 @@
+# Generated by Django 4.2.9 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0009_contadores_filtros'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cambioestado',
+            name='causa',
+            field=models.CharField(choices=[('ALTA', 'Alta del vehículo'), ('EDICION', 'Edición manual'), ('ASIGNACION', 'Inicio de asignación'), ('FINALIZACION', 'Fin de asignación'), ('ACCION_MASIVA', 'Acción masiva del admin'), ('AUDITORIA', 'Corrección de auditoría')], max_length=15, verbose_name='Causa'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacion',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['vehiculo'], name='asignacion_activa_vehiculo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacion',
+            index=models.Index(fields=['vehiculo', 'kilometraje_entrada'], name='asignacion_vehiculo_km_idx'),
+        ),
+    ]
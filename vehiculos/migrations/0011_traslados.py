@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0010_auditoria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrado',
+            name='traslado',
+            field=models.BooleanField(default=False, verbose_name='Traslado'),
+        ),
+    ]
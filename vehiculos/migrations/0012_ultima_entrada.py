@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-19 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehiculos', '0011_traslados'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='asignacion',
+            name='asignacion_vehiculo_km_idx',
+        ),
+        migrations.AddIndex(
+            model_name='asignacion',
+            index=models.Index(condition=models.Q(('kilometraje_entrada__isnull', False)), fields=['vehiculo', 'fecha_fin', 'id', 'kilometraje_entrada'], name='asignacion_ultima_entrada_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.conf import settings
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from django.db.models.signals import post_save, pre_save
@@ -13,7 +15,124 @@ class EstadoVehiculo(models.TextChoices):
     BAJA = 'BAJA', 'Dado de Baja'
 
 
-class Vehiculo(models.Model):
+class CausaCambio(models.TextChoices):
+    """Origen de una transición de estado de un vehículo"""
+    ALTA = 'ALTA', 'Alta del vehículo'
+    EDICION = 'EDICION', 'Edición manual'
+    ASIGNACION = 'ASIGNACION', 'Inicio de asignación'
+    FINALIZACION = 'FINALIZACION', 'Fin de asignación'
+    ACCION_MASIVA = 'ACCION_MASIVA', 'Acción masiva del admin'
+    AUDITORIA = 'AUDITORIA', 'Corrección de auditoría'
+
+
+class Taller(models.Model):
+    """Taller/sede: cada vehículo y sus asignaciones pertenecen a uno"""
+    
+    codigo = models.CharField(max_length=20, unique=True, verbose_name='Código')
+    nombre = models.CharField(max_length=100, verbose_name='Nombre')
+    
+    class Meta:
+        verbose_name = 'Taller'
+        verbose_name_plural = 'Talleres'
+        ordering = ['nombre']
+    
+    def __str__(self):
+        return self.nombre
+
+
+class PerfilUsuario(models.Model):
+    """Taller al que está limitado un usuario. Sin perfil, el usuario ve todos los talleres."""
+    
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='perfil',
+        verbose_name='Usuario'
+    )
+    
+    taller = models.ForeignKey(
+        Taller,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='usuarios',
+        verbose_name='Taller',
+        help_text='Vacío = acceso a todos los talleres'
+    )
+    
+    class Meta:
+        verbose_name = 'Perfil de Usuario'
+        verbose_name_plural = 'Perfiles de Usuario'
+    
+    def __str__(self):
+        return f"{self.usuario} ({self.taller or 'todos los talleres'})"
+
+
+def taller_de_usuario(usuario):
+    """ID del taller al que está limitado el usuario, o None si ve todos"""
+    perfil = getattr(usuario, 'perfil', None)
+    return perfil.taller_id if perfil is not None else None
+
+
+class TallerQuerySet(models.QuerySet):
+    """Consultas particionadas por taller"""
+    
+    def del_taller(self, taller_id):
+        return self.filter(taller_id=taller_id)
+    
+    def para_usuario(self, usuario):
+        """Limita al taller del usuario (sin filtro si ve todos los talleres)"""
+        taller_id = taller_de_usuario(usuario)
+        if taller_id is None:
+            return self
+        return self.del_taller(taller_id)
+
+
+class SecuenciaSync(models.Model):
+    """
+    Contador global de cambios para la sincronización incremental.
+    
+    Una única fila: cada escritura sobre Vehiculo/Asignacion la incrementa
+    dentro de su transacción. El UPDATE bloquea la fila hasta el commit, así
+    que las versiones se confirman en orden y un cliente que lee "cambios
+    desde la versión N" nunca se salta una escritura más antigua.
+    """
+    
+    valor = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Secuencia de Sincronización'
+    
+    @classmethod
+    def siguiente(cls):
+        """Reserva y devuelve la siguiente versión (llamar dentro de una transacción)"""
+        if not cls.objects.filter(pk=1).update(valor=F('valor') + 1):
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(valor=F('valor') + 1)
+        return cls.objects.values_list('valor', flat=True).get(pk=1)
+
+
+class ModeloSincronizable(models.Model):
+    """
+    Base de los modelos que sirve el feed de vehiculos.sincronizacion.
+    save() asigna una versión nueva; los queryset.update() deben pasar
+    version=SecuenciaSync.siguiente() (ver vehiculos.transiciones).
+    """
+    
+    version = models.BigIntegerField(default=0, editable=False, verbose_name='Versión')
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            self.version = SecuenciaSync.siguiente()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+            super().save(*args, **kwargs)
+
+
+class Vehiculo(ModeloSincronizable):
     """Modelo principal para gestionar vehículos de sustitución"""
     
     # Validador para matrícula española
@@ -22,6 +141,13 @@ class Vehiculo(models.Model):
         message='Formato de matrícula inválido. Debe ser 4 números seguidos de 3 letras (ej: 0987TRE)'
     )
     
+    taller = models.ForeignKey(
+        Taller,
+        on_delete=models.PROTECT,
+        related_name='vehiculos',
+        verbose_name='Taller'
+    )
+    
     matricula = models.CharField(
         max_length=7,
         unique=True,
@@ -58,26 +184,93 @@ class Vehiculo(models.Model):
         verbose_name='Última Revisión'
     )
     
+    # Prioridad del asignador automático (vehiculos/asignador.py): se actualiza
+    # cada vez que el vehículo pasa a DISPONIBLE
+    disponible_desde = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Disponible desde'
+    )
+    
     observaciones = models.TextField(
         blank=True,
         verbose_name='Observaciones',
         help_text='Notas adicionales sobre el vehículo'
     )
     
+    objects = TallerQuerySet.as_manager()
+    
+    # Valores que se recuerdan al leer para actualizar los contadores de los
+    # filtros del admin (vehiculos/facetas.py)
+    CAMPOS_FILTRO = ('taller_id', 'marca', 'año')
+    
     class Meta:
         verbose_name = 'Vehículo'
         verbose_name_plural = 'Vehículos'
         ordering = ['estado', 'matricula']
+        indexes = [
+            models.Index(fields=['version', 'id'], name='vehiculo_version_idx'),
+            models.Index(fields=['taller', 'estado', 'matricula'], name='vehiculo_taller_estado_idx'),
+            # Candidatos del asignador, ya en orden de prioridad
+            models.Index(
+                fields=['taller', 'kilometraje', 'disponible_desde', 'id'],
+                condition=models.Q(estado=EstadoVehiculo.DISPONIBLE),
+                name='vehiculo_candidatos_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.matricula} - {self.marca} {self.modelo} ({self.get_estado_display()})"
     
+    def save(self, *args, **kwargs):
+        anterior = getattr(self, '_estado_original', None)
+        if anterior is not None and anterior != self.estado and self.estado == EstadoVehiculo.DISPONIBLE:
+            self.disponible_desde = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'disponible_desde'}
+        # Taller leído de la BD (antes de que post_save actualice _filtros_originales)
+        taller_anterior = (getattr(self, '_filtros_originales', None) or {}).get('taller_id')
+        if kwargs.get('update_fields') is not None and not {'taller', 'taller_id'} & set(kwargs['update_fields']):
+            taller_anterior = None
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if taller_anterior is not None and taller_anterior != self.taller_id:
+                self._trasladar_asignaciones(taller_anterior)
+    
+    def _trasladar_asignaciones(self, taller_anterior):
+        """
+        Lleva las asignaciones al nuevo taller (Asignacion.taller es una copia)
+        y deja lápidas de traslado del vehículo y sus asignaciones para el
+        feed del taller de origen, que deja de ver estas filas.
+        """
+        from . import facetas
+        
+        asignaciones = Asignacion.objects.filter(vehiculo=self)
+        version = SecuenciaSync.siguiente()
+        lapidas = [Borrado(modelo='vehiculo', objeto_id=self.pk, taller_id=taller_anterior, version=version, traslado=True)]
+        lapidas += [
+            Borrado(modelo='asignacion', objeto_id=asignacion_id, taller_id=taller_anterior, version=version, traslado=True)
+            for asignacion_id in asignaciones.values_list('id', flat=True)
+        ]
+        Borrado.objects.bulk_create(lapidas, batch_size=500)
+        facetas.descontar(asignaciones)
+        asignaciones.update(taller_id=self.taller_id, version=version)
+        facetas.contar(asignaciones)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Recordar el estado leído para detectar la transición al guardar
+        instancia._estado_original = instancia.__dict__.get('estado')
+        instancia._filtros_originales = {campo: instancia.__dict__.get(campo) for campo in cls.CAMPOS_FILTRO}
+        return instancia
+    
     def esta_disponible(self):
         """Verifica si el vehículo está disponible para asignación"""
         return self.estado == EstadoVehiculo.DISPONIBLE
 
 
-class Asignacion(models.Model):
+class Asignacion(ModeloSincronizable):
     """Registro de asignaciones de vehículos a clientes/trabajos"""
     
     vehiculo = models.ForeignKey(
@@ -87,6 +280,15 @@ class Asignacion(models.Model):
         verbose_name='Vehículo'
     )
     
+    # Copia de vehiculo.taller para que las consultas por taller no necesiten JOIN
+    taller = models.ForeignKey(
+        Taller,
+        on_delete=models.PROTECT,
+        editable=False,
+        related_name='asignaciones',
+        verbose_name='Taller'
+    )
+    
     cliente = models.CharField(
         max_length=100,
         verbose_name='Cliente/Asignado a'
@@ -127,15 +329,42 @@ class Asignacion(models.Model):
         verbose_name='Asignación Activa'
     )
     
+    objects = TallerQuerySet.as_manager()
+    
+    CAMPOS_FILTRO = ('taller_id', 'activa', 'fecha_inicio')
+    
     class Meta:
         verbose_name = 'Asignación'
         verbose_name_plural = 'Asignaciones'
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['version', 'id'], name='asignacion_version_idx'),
+            models.Index(fields=['taller', 'activa', '-fecha_inicio'], name='asignacion_taller_activa_idx'),
+            # Comprobaciones de vehiculos/auditoria.py: asignación activa y km de la última entrada por vehículo
+            models.Index(fields=['vehiculo'], condition=models.Q(activa=True), name='asignacion_activa_vehiculo_idx'),
+            models.Index(
+                fields=['vehiculo', 'fecha_fin', 'id', 'kilometraje_entrada'],
+                condition=models.Q(kilometraje_entrada__isnull=False),
+                name='asignacion_ultima_entrada_idx',
+            ),
+        ]
     
     def __str__(self):
         estado = "Activa" if self.activa else "Finalizada"
         return f"{self.vehiculo.matricula} - {self.cliente} ({estado})"
     
+    def save(self, *args, **kwargs):
+        self.taller_id = self.vehiculo.taller_id
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'taller'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._filtros_originales = {campo: instancia.__dict__.get(campo) for campo in cls.CAMPOS_FILTRO}
+        return instancia
+    
     def finalizar(self, kilometraje_entrada):
         """Finaliza una asignación y actualiza el estado del vehículo"""
         self.activa = False
@@ -146,18 +375,24 @@ class Asignacion(models.Model):
         # Actualizar kilometraje del vehículo y estado
         self.vehiculo.kilometraje = kilometraje_entrada
         self.vehiculo.estado = EstadoVehiculo.DISPONIBLE
+        self.vehiculo._causa_cambio = CausaCambio.FINALIZACION
         self.vehiculo.save()
 
     @staticmethod
-    def limpiar_asignaciones_antiguas(semanas=3):
+    def limpiar_asignaciones_antiguas(semanas=3, confirmar=False):
         """
         SISTEMA DE LIMPIEZA - Elimina asignaciones finalizadas de hace más de N semanas.
         
         Uso:
-            # Borrar asignaciones finalizadas hace más de 3 semanas
+            # Ver cuántas asignaciones finalizadas hace más de 3 semanas se borrarían
             from vehiculos.models import Asignacion
-            asignaciones_borradas = Asignacion.limpiar_asignaciones_antiguas(semanas=3)
-            print(f"Se borraron {asignaciones_borradas} asignaciones antiguas")
+            asignaciones_antiguas = Asignacion.limpiar_asignaciones_antiguas(semanas=3)
+            
+            # Borrarlas de verdad
+            Asignacion.limpiar_asignaciones_antiguas(semanas=3, confirmar=True)
+        
+        Tarea periódica: vehiculos.tareas la ejecuta con confirmar=True
+        # python manage.py ejecutar_tareas
         
         Alternativa: Management Command
         # Crear archivo: vehiculos/management/commands/limpiar_asignaciones.py
@@ -179,18 +414,238 @@ class Asignacion(models.Model):
             print(f"⚠️  Se van a eliminar {cantidad} asignaciones finalizadas hace más de {semanas} semanas")
             print(f"   Fecha límite: {fecha_limite.strftime('%d/%m/%Y %H:%M')}")
             
-            # DESCOMENTA LA SIGUIENTE LÍNEA PARA EJECUTAR LA LIMPIEZA:
-            # asignaciones_a_eliminar.delete()
-            # print(f"✅ Se eliminaron {cantidad} asignaciones exitosamente")
-            
-            print("   Para ejecutar la limpieza, descomenta la línea de delete() en el código")
+            if confirmar:
+                from .sincronizacion import borrar_con_lapidas
+                borrar_con_lapidas(asignaciones_a_eliminar)
+                print(f"✅ Se eliminaron {cantidad} asignaciones exitosamente")
+            else:
+                print("   Para ejecutar la limpieza, llama con confirmar=True")
         else:
             print(f"✅ No hay asignaciones para eliminar (anterior a {fecha_limite.strftime('%d/%m/%Y')})")
         
         return cantidad
 
 
+class ContadorFiltro(models.Model):
+    """
+    Número de filas por valor de un filtro del admin y taller (p.ej. cuántos
+    vehículos Seat tiene el taller). Lo mantiene vehiculos.facetas.
+    """
+    
+    faceta = models.CharField(max_length=30, verbose_name='Faceta')
+    taller = models.ForeignKey(
+        Taller,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Taller'
+    )
+    valor = models.CharField(max_length=50, verbose_name='Valor')
+    total = models.IntegerField(default=0, verbose_name='Total')
+    
+    class Meta:
+        verbose_name = 'Contador de Filtro'
+        verbose_name_plural = 'Contadores de Filtros'
+        constraints = [
+            models.UniqueConstraint(fields=['faceta', 'taller', 'valor'], name='contador_filtro_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.faceta}={self.valor}: {self.total}"
+
+
+class Borrado(models.Model):
+    """Lápida de un Vehiculo/Asignacion borrado, para el feed de sincronización"""
+    
+    modelo = models.CharField(max_length=20, verbose_name='Modelo')
+    objeto_id = models.BigIntegerField(verbose_name='ID')
+    taller_id = models.BigIntegerField(null=True, verbose_name='Taller')
+    version = models.BigIntegerField(verbose_name='Versión')
+    # La fila sigue existiendo en otro taller: solo se envía al feed del taller de origen
+    traslado = models.BooleanField(default=False, verbose_name='Traslado')
+    fecha = models.DateTimeField(default=timezone.now, verbose_name='Fecha')
+    
+    class Meta:
+        verbose_name = 'Borrado'
+        verbose_name_plural = 'Borrados'
+        indexes = [
+            models.Index(fields=['version', 'id'], name='borrado_version_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id} (v{self.version})"
+
+
+class CambioEstado(models.Model):
+    """
+    Registro append-only de las transiciones de estado de un vehículo.
+    
+    Las filas no se crean directamente: se encolan con vehiculos.historial
+    y se insertan por lotes al terminar la petición.
+    """
+    
+    vehiculo = models.ForeignKey(
+        Vehiculo,
+        on_delete=models.CASCADE,
+        related_name='cambios_estado',
+        verbose_name='Vehículo'
+    )
+    
+    estado_anterior = models.CharField(
+        max_length=15,
+        blank=True,
+        choices=EstadoVehiculo.choices,
+        verbose_name='Estado Anterior'
+    )
+    
+    estado_nuevo = models.CharField(
+        max_length=15,
+        choices=EstadoVehiculo.choices,
+        verbose_name='Estado Nuevo'
+    )
+    
+    causa = models.CharField(
+        max_length=15,
+        choices=CausaCambio.choices,
+        verbose_name='Causa'
+    )
+    
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Usuario'
+    )
+    
+    fecha = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha'
+    )
+    
+    class Meta:
+        verbose_name = 'Cambio de Estado'
+        verbose_name_plural = 'Cambios de Estado'
+        ordering = ['-fecha']
+        indexes = [
+            # Línea temporal por vehículo: WHERE vehiculo_id = X ORDER BY fecha DESC
+            models.Index(fields=['vehiculo', '-fecha'], name='cambio_vehiculo_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vehiculo_id}: {self.estado_anterior or '-'} → {self.estado_nuevo} ({self.get_causa_display()})"
+
+
+class TareaProgramada(models.Model):
+    """
+    Estado de una tarea periódica de vehiculos.tareas: cuándo toca la
+    siguiente ejecución y qué proceso tiene el lease para ejecutarla.
+    """
+    
+    nombre = models.CharField(max_length=50, unique=True, verbose_name='Nombre')
+    
+    proxima_ejecucion = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Próxima Ejecución'
+    )
+    
+    bloqueada_hasta = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Bloqueada Hasta',
+        help_text='Fin del lease del proceso que la está ejecutando'
+    )
+    
+    propietario = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Propietario',
+        help_text='host:pid del proceso con el lease'
+    )
+    
+    fallos_consecutivos = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Fallos Consecutivos'
+    )
+    
+    class Meta:
+        verbose_name = 'Tarea Programada'
+        verbose_name_plural = 'Tareas Programadas'
+        ordering = ['nombre']
+    
+    def __str__(self):
+        return self.nombre
+
+
+class EjecucionTarea(models.Model):
+    """Registro de cada ejecución de una tarea periódica"""
+    
+    tarea = models.CharField(max_length=50, verbose_name='Tarea')
+    inicio = models.DateTimeField(verbose_name='Inicio')
+    duracion = models.FloatField(verbose_name='Duración (s)')
+    filas = models.PositiveIntegerField(default=0, verbose_name='Filas Afectadas')
+    exito = models.BooleanField(default=True, verbose_name='Éxito')
+    error = models.TextField(blank=True, verbose_name='Error')
+    
+    class Meta:
+        verbose_name = 'Ejecución de Tarea'
+        verbose_name_plural = 'Ejecuciones de Tareas'
+        ordering = ['-inicio']
+        indexes = [
+            models.Index(fields=['tarea', '-inicio'], name='ejecucion_tarea_inicio_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tarea} {self.inicio:%d/%m/%Y %H:%M} ({'OK' if self.exito else 'ERROR'})"
+
+
+class ResumenFlota(models.Model):
+    """Resumen diario de la flota, recalculado por la tarea 'resumen_flota'"""
+    
+    fecha = models.DateField(unique=True, verbose_name='Fecha')
+    total = models.PositiveIntegerField(default=0, verbose_name='Total')
+    disponibles = models.PositiveIntegerField(default=0, verbose_name='Disponibles')
+    en_uso = models.PositiveIntegerField(default=0, verbose_name='En Uso')
+    baja = models.PositiveIntegerField(default=0, verbose_name='De Baja')
+    asignaciones_iniciadas = models.PositiveIntegerField(default=0, verbose_name='Asignaciones Iniciadas')
+    km_recorridos = models.PositiveIntegerField(default=0, verbose_name='Km Recorridos')
+    actualizado = models.DateTimeField(auto_now=True, verbose_name='Actualizado')
+    
+    class Meta:
+        verbose_name = 'Resumen de Flota'
+        verbose_name_plural = 'Resúmenes de Flota'
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"Resumen {self.fecha:%d/%m/%Y}"
+
+
 # Signals para automatizar estados de vehículos
+@receiver(post_save, sender=Vehiculo)
+def registrar_transicion_vehiculo(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Encola en el historial cualquier cambio de estado guardado con save().
+    Los cambios masivos con queryset.update() se registran desde quien los hace.
+    """
+    from . import historial
+    
+    if update_fields is not None and 'estado' not in update_fields:
+        return
+    
+    if created:
+        anterior = ''
+        causa = CausaCambio.ALTA
+    else:
+        anterior = getattr(instance, '_estado_original', None)
+        causa = getattr(instance, '_causa_cambio', CausaCambio.EDICION)
+        if anterior is None or anterior == instance.estado:
+            return
+    
+    historial.registrar(instance.pk, anterior, instance.estado, causa)
+    instance._estado_original = instance.estado
+    instance._causa_cambio = CausaCambio.EDICION
+
+
 @receiver(post_save, sender=Asignacion)
 def actualizar_estado_vehiculo_en_asignacion(sender, instance, created, **kwargs):
     """
@@ -201,6 +656,7 @@ def actualizar_estado_vehiculo_en_asignacion(sender, instance, created, **kwargs
         # Si la asignación está activa, el vehículo debe estar EN_USO
         if instance.vehiculo.estado != EstadoVehiculo.EN_USO:
             instance.vehiculo.estado = EstadoVehiculo.EN_USO
+            instance.vehiculo._causa_cambio = CausaCambio.ASIGNACION
             instance.vehiculo.save(update_fields=['estado'])
     else:
         # Si la asignación se finaliza, verificar si hay otras asignaciones activas
@@ -219,4 +675,5 @@ def actualizar_estado_vehiculo_en_asignacion(sender, instance, created, **kwargs
             # No hay otras asignaciones activas, marcar como DISPONIBLE
             if instance.vehiculo.estado != EstadoVehiculo.DISPONIBLE:
                 instance.vehiculo.estado = EstadoVehiculo.DISPONIBLE
+                instance.vehiculo._causa_cambio = CausaCambio.FINALIZACION
                 instance.vehiculo.save(update_fields=['estado'])
@@ -0,0 +1,132 @@
+"""
+Sincronización incremental ("cambios desde el cursor") para clientes offline.
+
+Cada Vehiculo/Asignacion lleva una `version` de SecuenciaSync que cambia en
+cada save() y en los queryset.update() de la app; los borrados dejan una
+lápida en Borrado con su propia versión. El feed devuelve, para cada tabla,
+las filas con (version, id) posterior al cursor del cliente, en lotes de
+como mucho `limite` filas por tabla.
+
+Cuando un vehículo cambia de taller, él y sus asignaciones dejan lápidas de
+traslado (Borrado.traslado) que solo recibe el feed del taller de origen.
+
+El cursor es opaco para el cliente: se recibe en cada respuesta y se
+devuelve tal cual en la siguiente petición. Sin cursor se descarga todo.
+
+Uso:
+    GET /sync/                       -> primera descarga
+    GET /sync/?cursor=<cursor>       -> cambios desde la última sincronización
+    (repetir mientras la respuesta traiga "hay_mas": true)
+"""
+import base64
+import json
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import facetas
+from .models import Asignacion, Borrado, SecuenciaSync, Vehiculo
+
+LIMITE_POR_DEFECTO = 500
+LIMITE_MAXIMO = 2000
+
+CAMPOS_VEHICULO = [
+    'id', 'taller_id', 'matricula', 'marca', 'modelo', 'color', 'año', 'estado', 'kilometraje',
+    'fecha_alta', 'fecha_ultima_revision', 'observaciones', 'version',
+]
+CAMPOS_ASIGNACION = [
+    'id', 'vehiculo_id', 'taller_id', 'cliente', 'fecha_inicio', 'fecha_fin', 'kilometraje_salida',
+    'kilometraje_entrada', 'motivo', 'observaciones', 'activa', 'version',
+]
+CAMPOS_BORRADO = ['id', 'modelo', 'objeto_id', 'taller_id', 'version']
+
+# clave en la respuesta -> (queryset, campos)
+FUENTES = {
+    'vehiculos': (Vehiculo.objects.all, CAMPOS_VEHICULO),
+    'asignaciones': (Asignacion.objects.all, CAMPOS_ASIGNACION),
+    'borrados': (Borrado.objects.all, CAMPOS_BORRADO),
+}
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(posiciones):
+    datos = json.dumps(posiciones, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve {fuente: [version, id]}; sin cursor, todo desde el principio"""
+    posiciones = {fuente: [-1, 0] for fuente in FUENTES}
+    if not cursor:
+        return posiciones
+    try:
+        datos = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        leidas = json.loads(datos)
+        for fuente in FUENTES:
+            version, ultimo_id = leidas[fuente]
+            posiciones[fuente] = [int(version), int(ultimo_id)]
+    except (ValueError, KeyError, TypeError) as error:
+        raise CursorInvalido('Cursor de sincronización no válido') from error
+    return posiciones
+
+
+def cambios_desde(cursor=None, limite=LIMITE_POR_DEFECTO, taller_id=None):
+    """
+    Lote de cambios posteriores a `cursor` y el cursor para el siguiente lote.
+    Con `taller_id` solo se leen las filas (y lápidas) de ese taller.
+    """
+    posiciones = decodificar_cursor(cursor)
+    respuesta = {}
+    hay_mas = False
+
+    for fuente, (queryset, campos) in FUENTES.items():
+        version, ultimo_id = posiciones[fuente]
+        filas = queryset()
+        if taller_id is not None:
+            filas = filas.filter(taller_id=taller_id)
+        elif fuente == 'borrados':
+            # Sin taller se ven todas las filas: la de un traslado sigue existiendo
+            filas = filas.filter(traslado=False)
+        filas = list(
+            filas
+            .filter(Q(version__gt=version) | Q(version=version, id__gt=ultimo_id))
+            .order_by('version', 'id')
+            .values(*campos)[:limite + 1]
+        )
+        if len(filas) > limite:
+            hay_mas = True
+            filas = filas[:limite]
+        if filas:
+            posiciones[fuente] = [filas[-1]['version'], filas[-1]['id']]
+        respuesta[fuente] = filas
+
+    respuesta['cursor'] = codificar_cursor(posiciones)
+    respuesta['hay_mas'] = hay_mas
+    return respuesta
+
+
+def borrar_con_lapidas(queryset):
+    """
+    Borra el queryset (Vehiculo o Asignacion) dejando lápidas en bloque,
+    incluidas las de las asignaciones que se borran en cascada.
+    Devuelve el número de objetos del modelo principal borrados.
+    """
+    modelo = queryset.model
+    with transaction.atomic():
+        version = SecuenciaSync.siguiente()
+        lapidas = [
+            Borrado(modelo=modelo._meta.model_name, objeto_id=objeto_id, taller_id=taller_id, version=version)
+            for objeto_id, taller_id in queryset.values_list('id', 'taller_id')
+        ]
+        if modelo is Vehiculo:
+            lapidas += [
+                Borrado(modelo='asignacion', objeto_id=objeto_id, taller_id=taller_id, version=version)
+                for objeto_id, taller_id in Asignacion.objects.filter(vehiculo__in=queryset).values_list('id', 'taller_id')
+            ]
+        Borrado.objects.bulk_create(lapidas, batch_size=500)
+        facetas.descontar(queryset)
+        _, borrados = queryset.delete()
+    return borrados.get(modelo._meta.label, 0)
@@ -0,0 +1,75 @@
+"""
+Listados en streaming.
+
+render() construye el HTML entero en memoria y no envía nada hasta tener la
+última fila: con lista_asignaciones?filtro=todas el navegador espera a que
+se lean y pinten todas las asignaciones. Aquí la página se envía por partes
+con un StreamingHttpResponse:
+
+1. Cabecera: la plantilla de la página renderizada con el primer bloque de
+   filas y MARCADOR_FILAS en el <tbody>, cortada por el marcador
+2. Filas: la plantilla parcial (vehiculos/filas_*.html) por bloques de
+   FILAS_POR_BLOQUE, leídos de la BD a medida que se envían
+3. Pie: el resto de la página
+
+El HTML resultante es el mismo que con render(). GZipPorBloquesMiddleware
+(gescoches/compresion.py) comprime cada bloque según sale.
+
+El primer bloque se lee dentro de la vista, así que la consulta ya va a la
+base de datos que elige @lectura_replica; el resto de bloques salen del
+mismo cursor (iterator()) mientras se envía la respuesta.
+
+Uso:
+    return streaming.listado_en_streaming(
+        request, 'vehiculos/lista_vehiculos.html', 'vehiculos/filas_vehiculos.html',
+        context, 'vehiculos', filas.iterar_vehiculos(vehiculos),
+    )
+Medir: python manage.py medir_streaming
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+MARCADOR_FILAS = mark_safe('<!-- filas -->')
+
+FILAS_POR_BLOQUE = 500
+
+
+def _bloques(filas):
+    filas = iter(filas)
+    while bloque := list(islice(filas, FILAS_POR_BLOQUE)):
+        yield bloque
+
+
+def listado_en_streaming(request, plantilla, plantilla_filas, contexto, nombre_filas, filas):
+    """
+    StreamingHttpResponse de `plantilla` con las filas de `filas` (iterable)
+    pintadas por bloques con `plantilla_filas`. `nombre_filas` es la
+    variable que recorren las dos plantillas.
+    """
+    motor = settings.MOTOR_PLANTILLAS
+    bloques = _bloques(filas)
+    primero = next(bloques, [])
+
+    # La página ve el primer bloque ({% if vehiculos %}) pero no lo pinta
+    pagina = render_to_string(
+        plantilla,
+        {**contexto, nombre_filas: primero, 'marcador_filas': MARCADOR_FILAS},
+        request=request,
+        using=motor,
+    )
+    cabecera, _, pie = pagina.partition(MARCADOR_FILAS)
+    parcial = get_template(plantilla_filas, using=motor)
+
+    def contenido():
+        yield cabecera
+        if primero:
+            yield parcial.render({nombre_filas: primero})
+            for bloque in bloques:
+                yield parcial.render({nombre_filas: bloque})
+        yield pie
+
+    return StreamingHttpResponse(contenido())
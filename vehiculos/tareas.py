@@ -0,0 +1,219 @@
+"""
+Tareas periódicas sin Celery ni broker.
+
+Las tareas se registran con @tarea_periodica y las ejecuta el management
+command `ejecutar_tareas`. El estado de cada tarea vive en TareaProgramada:
+
+- Lease: antes de ejecutar, un UPDATE condicional marca la tarea como
+  bloqueada por este proceso durante `lease`. Solo un proceso consigue el
+  UPDATE, aunque haya varias instancias ejecutando el runner. Mientras la
+  tarea se ejecuta, un hilo renueva el lease cada `lease / 3`, así una
+  tarea más larga que su lease no la coge otro runner.
+- Backoff: si una tarea falla, la siguiente ejecución se retrasa
+  BACKOFF_BASE * 2^(fallos - 1), con jitter y como máximo BACKOFF_MAX.
+- Cada ejecución queda en EjecucionTarea con su duración y filas afectadas.
+
+Uso:
+    from vehiculos import tareas
+    tareas.ejecutar_pendientes()
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import facetas, historial
+from .models import (
+    Asignacion, EjecucionTarea, EstadoVehiculo, ResumenFlota, TareaProgramada, Vehiculo,
+)
+
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=1)
+
+IDENTIFICADOR = f'{socket.gethostname()}:{os.getpid()}'
+
+Tarea = namedtuple('Tarea', ['nombre', 'funcion', 'intervalo', 'lease'])
+
+_registro = {}
+
+logger = logging.getLogger(__name__)
+
+
+def tarea_periodica(nombre, intervalo, lease=timedelta(minutes=10)):
+    """Registra una función como tarea periódica. Debe devolver las filas afectadas."""
+    def decorador(funcion):
+        _registro[nombre] = Tarea(nombre, funcion, intervalo, lease)
+        return funcion
+    return decorador
+
+
+def tareas_registradas():
+    return list(_registro.values())
+
+
+def calcular_backoff(fallos):
+    """Espera tras `fallos` fallos consecutivos, con jitter entre la mitad y el total"""
+    espera = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (fallos - 1))
+    return espera * random.uniform(0.5, 1)
+
+
+def adquirir_lease(tarea, forzar=False):
+    """Intenta reservar la tarea para este proceso. True si se ha conseguido."""
+    ahora = timezone.now()
+    pendientes = TareaProgramada.objects.filter(nombre=tarea.nombre).filter(
+        Q(bloqueada_hasta__isnull=True) | Q(bloqueada_hasta__lt=ahora)
+    )
+    if not forzar:
+        pendientes = pendientes.filter(proxima_ejecucion__lte=ahora)
+    return pendientes.update(bloqueada_hasta=ahora + tarea.lease, propietario=IDENTIFICADOR) == 1
+
+
+def renovar_lease(tarea):
+    """Alarga el lease de una tarea que sigue siendo de este proceso. True si se ha conseguido."""
+    return TareaProgramada.objects.filter(nombre=tarea.nombre, propietario=IDENTIFICADOR).exclude(
+        bloqueada_hasta__isnull=True
+    ).update(bloqueada_hasta=timezone.now() + tarea.lease) == 1
+
+
+@contextmanager
+def _renovando_lease(tarea):
+    """Renueva el lease de `tarea` en un hilo aparte mientras dura el bloque"""
+    terminar = threading.Event()
+
+    def renovar():
+        try:
+            while not terminar.wait(tarea.lease.total_seconds() / 3):
+                try:
+                    if not renovar_lease(tarea):
+                        logger.warning('La tarea %s ya no tiene el lease de %s', tarea.nombre, IDENTIFICADOR)
+                except DatabaseError:
+                    logger.exception('No se ha podido renovar el lease de la tarea %s', tarea.nombre)
+        finally:
+            connection.close()
+
+    hilo = threading.Thread(target=renovar, name=f'lease-{tarea.nombre}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        terminar.set()
+        hilo.join()
+
+
+def ejecutar_pendientes(nombres=None, forzar=False):
+    """
+    Ejecuta cada tarea vencida cuyo lease se consiga.
+    Devuelve la lista de EjecucionTarea de esta pasada.
+    """
+    TareaProgramada.objects.bulk_create(
+        [TareaProgramada(nombre=nombre) for nombre in _registro],
+        ignore_conflicts=True,
+    )
+
+    ejecuciones = []
+    for tarea in _registro.values():
+        if nombres and tarea.nombre not in nombres:
+            continue
+        if adquirir_lease(tarea, forzar):
+            ejecuciones.append(_ejecutar(tarea))
+    return ejecuciones
+
+
+def _ejecutar(tarea):
+    inicio = timezone.now()
+    t0 = time.perf_counter()
+    filas = 0
+    error = ''
+    with _renovando_lease(tarea):
+        try:
+            filas = tarea.funcion() or 0
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            # Fuera de una petición el historial no se vuelca solo, y lo que
+            # quede en el buffer no debe pasar a la siguiente tarea del hilo
+            try:
+                historial.volcar()
+            except Exception:
+                logger.exception('Error al volcar el historial de la tarea %s', tarea.nombre)
+    duracion = time.perf_counter() - t0
+
+    estado = TareaProgramada.objects.get(nombre=tarea.nombre)
+    if error:
+        fallos = estado.fallos_consecutivos + 1
+        proxima = timezone.now() + calcular_backoff(fallos)
+    else:
+        fallos = 0
+        proxima = inicio + tarea.intervalo
+    TareaProgramada.objects.filter(nombre=tarea.nombre, propietario=IDENTIFICADOR).update(
+        proxima_ejecucion=proxima,
+        fallos_consecutivos=fallos,
+        bloqueada_hasta=None,
+    )
+
+    return EjecucionTarea.objects.create(
+        tarea=tarea.nombre,
+        inicio=inicio,
+        duracion=duracion,
+        filas=filas,
+        exito=not error,
+        error=error,
+    )
+
+
+# Tareas de GesCoches
+# ===================
+
+@tarea_periodica('limpiar_asignaciones', intervalo=timedelta(days=1))
+def limpiar_asignaciones():
+    """Borra las asignaciones finalizadas hace más de TAREAS_LIMPIEZA_SEMANAS semanas"""
+    return Asignacion.limpiar_asignaciones_antiguas(
+        semanas=settings.TAREAS_LIMPIEZA_SEMANAS,
+        confirmar=True,
+    )
+
+
+@tarea_periodica('resumen_flota', intervalo=timedelta(minutes=15))
+def resumen_flota():
+    """Recalcula el ResumenFlota del día actual"""
+    hoy = timezone.localdate()
+    inicio_dia = timezone.make_aware(datetime.combine(hoy, datetime.min.time()))
+
+    vehiculos = Vehiculo.objects.aggregate(
+        total=Count('id'),
+        disponibles=Count('id', filter=Q(estado=EstadoVehiculo.DISPONIBLE)),
+        en_uso=Count('id', filter=Q(estado=EstadoVehiculo.EN_USO)),
+        baja=Count('id', filter=Q(estado=EstadoVehiculo.BAJA)),
+    )
+    iniciadas = Asignacion.objects.filter(fecha_inicio__gte=inicio_dia).count()
+    km = Asignacion.objects.filter(
+        fecha_fin__gte=inicio_dia,
+        kilometraje_entrada__isnull=False,
+    ).aggregate(km=Sum(F('kilometraje_entrada') - F('kilometraje_salida')))['km']
+
+    ResumenFlota.objects.update_or_create(
+        fecha=hoy,
+        defaults={
+            **vehiculos,
+            'asignaciones_iniciadas': iniciadas,
+            'km_recorridos': max(km or 0, 0),
+        },
+    )
+    return 1
+
+
+@tarea_periodica('recalcular_filtros', intervalo=timedelta(days=1))
+def recalcular_filtros():
+    """Rehace los contadores de los filtros del admin (corrige cambios hechos sin save())"""
+    return facetas.recalcular()
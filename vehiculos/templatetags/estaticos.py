@@ -0,0 +1,47 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from gescoches.storage import CSS_CRITICO, CSS_ORIGEN, extraer_css_critico
+
+register = template.Library()
+
+
+def _leer_css_critico():
+    # Generado por collectstatic (GesCochesStaticStorage)
+    if staticfiles_storage.exists(CSS_CRITICO):
+        with staticfiles_storage.open(CSS_CRITICO) as fichero:
+            return fichero.read().decode('utf-8')
+    # Sin collectstatic (desarrollo): se calcula desde el CSS original
+    origen = finders.find(CSS_ORIGEN)
+    with open(origen, encoding='utf-8') as fichero:
+        return extraer_css_critico(fichero.read())
+
+
+_leer_css_critico_cacheado = lru_cache(maxsize=1)(_leer_css_critico)
+
+
+@register.simple_tag
+def css_critico():
+    """
+    Incrusta el CSS crítico y carga styles.css sin bloquear el render.
+    Con CSS_CRITICO_INLINE = False devuelve el <link> normal.
+    """
+    url = static(CSS_ORIGEN)
+    if not settings.CSS_CRITICO_INLINE:
+        return format_html('<link rel="stylesheet" href="{}">', url)
+
+    css = _leer_css_critico() if settings.DEBUG else _leer_css_critico_cacheado()
+    # CSS generado por nuestro collectstatic: sin escapar, o las comillas y los > rompen las reglas
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(css), url, url
+    )
@@ -0,0 +1,75 @@
+"""
+Transiciones de estado masivas y validadas.
+
+Cambiar el estado de muchos vehículos a la vez no se hace fila a fila: una
+sola consulta clasifica la selección en permitidos y bloqueados (con un
+EXISTS sobre las asignaciones activas) y un único UPDATE aplica el cambio a
+los permitidos, todo dentro de la misma transacción. El número de consultas
+no depende de cuántos vehículos se seleccionen.
+
+Uso:
+    from vehiculos.transiciones import aplicar_transicion_masiva
+    resultado = aplicar_transicion_masiva(queryset, EstadoVehiculo.BAJA, usuario=request.user)
+    resultado.aplicados   # nº de vehículos cambiados
+    resultado.bloqueados  # matrículas que tienen una asignación activa
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import historial
+from .models import Asignacion, EstadoVehiculo, CausaCambio, SecuenciaSync
+
+# Estados a los que no puede pasar un vehículo con una asignación activa
+ESTADOS_SIN_ASIGNACION_ACTIVA = {EstadoVehiculo.DISPONIBLE, EstadoVehiculo.BAJA}
+
+ResultadoTransicion = namedtuple('ResultadoTransicion', ['aplicados', 'bloqueados'])
+
+
+def _asignacion_activa():
+    return Exists(Asignacion.objects.filter(vehiculo=OuterRef('pk'), activa=True))
+
+
+def aplicar_transicion_masiva(queryset, estado_nuevo, causa=CausaCambio.ACCION_MASIVA, usuario=None):
+    """
+    Pasa a `estado_nuevo` todos los vehículos del queryset que lo permitan.
+
+    Los vehículos que ya están en ese estado se ignoran. Devuelve un
+    ResultadoTransicion con el número de vehículos cambiados y las
+    matrículas de los bloqueados.
+    """
+    requiere_libre = estado_nuevo in ESTADOS_SIN_ASIGNACION_ACTIVA
+
+    with transaction.atomic():
+        candidatos = (
+            queryset.exclude(estado=estado_nuevo)
+            .order_by()
+            .select_for_update()
+            .annotate(bloqueado=_asignacion_activa())
+            .values_list('id', 'estado', 'matricula', 'bloqueado')
+        )
+
+        permitidos = []
+        bloqueados = []
+        for vehiculo_id, estado, matricula, bloqueado in candidatos:
+            if requiere_libre and bloqueado:
+                bloqueados.append(matricula)
+            else:
+                permitidos.append((vehiculo_id, estado))
+
+        aplicados = 0
+        if permitidos:
+            # Mismo predicado que la clasificación, sin pasar la lista de ids
+            actualizar = queryset.exclude(estado=estado_nuevo)
+            if requiere_libre:
+                actualizar = actualizar.exclude(_asignacion_activa())
+            campos = {'estado': estado_nuevo, 'version': SecuenciaSync.siguiente()}
+            if estado_nuevo == EstadoVehiculo.DISPONIBLE:
+                # Lo que haría Vehiculo.save() (prioridad del asignador)
+                campos['disponible_desde'] = timezone.now()
+            aplicados = actualizar.update(**campos)
+            historial.registrar_lote(permitidos, estado_nuevo, causa, usuario)
+
+    return ResultadoTransicion(aplicados, sorted(bloqueados))
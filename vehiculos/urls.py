@@ -8,5 +8,10 @@ urlpatterns = [
     path('vehiculos/', views.lista_vehiculos, name='lista_vehiculos'),
     path('vehiculos/<int:vehiculo_id>/', views.detalle_vehiculo, name='detalle_vehiculo'),
     path('asignaciones/', views.lista_asignaciones, name='lista_asignaciones'),
+    path('talleres/', views.informe_talleres, name='informe_talleres'),
+    path('sync/', views.sincronizar, name='sincronizar'),
+    path('admin/pool/', views.estado_pool, name='estado_pool'),
+    path('admin/auditoria/', views.auditoria_admin, name='auditoria_admin'),
+    path('admin/asignar-vehiculos/', views.asignar_lote_admin, name='asignar_lote_admin'),
     path('admin/limpiar-asignaciones/', views.limpiar_asignaciones_admin, name='limpiar_asignaciones_admin'),
 ]
@@ -1,10 +1,16 @@
+import os
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count, Q
 from django.contrib import messages
-from django.http import HttpResponseRedirect, HttpResponseForbidden
+from django.http import HttpResponseRedirect, HttpResponseForbidden, HttpResponseBadRequest, JsonResponse
 from django.urls import reverse
-from .models import Vehiculo, Asignacion, EstadoVehiculo
+from gescoches.postgresql.pool import estadisticas_pools
+from gescoches.replica import lectura_replica
+from .models import Vehiculo, Asignacion, EstadoVehiculo, Taller, taller_de_usuario
+from . import asignador, auditoria, filas, informes, sincronizacion, streaming
 
 
 # SISTEMA DE LIMPIEZA DE ASIGNACIONES ANTIGUAS
@@ -20,9 +26,9 @@ from .models import Vehiculo, Asignacion, EstadoVehiculo
 #   >>> from vehiculos.models import Asignacion
 #   >>> Asignacion.limpiar_asignaciones_antiguas(semanas=3)
 #
-# OPCIÓN 3: Desde una tarea programada (Celery)
-#   Agregar una tarea periódica que ejecute:
-#   Asignacion.limpiar_asignaciones_antiguas(semanas=3)
+# OPCIÓN 3: Tarea periódica (vehiculos/tareas.py, sin Celery)
+#   python manage.py ejecutar_tareas
+#   Ejecuta la limpieza cada día con TAREAS_LIMPIEZA_SEMANAS (default: 3)
 #
 # OPCIÓN 4: Botón en el Admin de Django (VER ABAJO)
 #   ↓↓↓
@@ -47,7 +53,7 @@ def limpiar_asignaciones_admin(request):
     fecha_limite = timezone.now() - timedelta(weeks=semanas)
     
     # Obtener asignaciones a eliminar
-    asignaciones_a_eliminar = Asignacion.objects.filter(
+    asignaciones_a_eliminar = Asignacion.objects.para_usuario(request.user).filter(
         activa=False,
         fecha_fin__lt=fecha_limite
     )
@@ -55,8 +61,8 @@ def limpiar_asignaciones_admin(request):
     cantidad = asignaciones_a_eliminar.count()
     
     if request.method == 'POST' and request.POST.get('confirmar') == 'si':
-        # Ejecutar eliminación
-        asignaciones_a_eliminar.delete()
+        # Ejecutar eliminación (dejando lápidas para la sincronización)
+        sincronizacion.borrar_con_lapidas(asignaciones_a_eliminar)
         messages.success(request, f'✅ Se eliminaron {cantidad} asignaciones finalizadas hace más de {semanas} semanas.')
         return HttpResponseRedirect(reverse('admin:vehiculos_asignacion_changelist'))
     
@@ -67,25 +73,118 @@ def limpiar_asignaciones_admin(request):
         'fecha_limite': fecha_limite,
         'asignaciones': asignaciones_a_eliminar[:20],
         'total_mostrado': min(20, cantidad),
+        'sin_mostrar': cantidad - min(20, cantidad),
     }
     
     return render(request, 'admin/limpiar_asignaciones.html', context)
 
 
+@login_required
+def asignar_lote_admin(request):
+    """
+    Asignación automática de N vehículos a un cliente desde el admin.
+    Solo accesible a usuarios staff (admin).
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("No tienes permisos para acceder a esta página")
+    
+    # Un usuario limitado a un taller solo asigna en el suyo
+    taller_id = taller_de_usuario(request.user)
+    talleres = None
+    if taller_id is None:
+        talleres = list(Taller.objects.all())
+        if not talleres:
+            messages.error(request, '❌ No hay talleres registrados.')
+            return HttpResponseRedirect(reverse('admin:vehiculos_asignacion_changelist'))
+        elegido = request.POST.get('taller') or request.GET.get('taller')
+        ids = {taller.id for taller in talleres}
+        taller_id = int(elegido) if elegido and elegido.isdigit() and int(elegido) in ids else talleres[0].id
+    
+    cliente = request.POST.get('cliente', '').strip()
+    motivo = request.POST.get('motivo', '').strip()
+    cantidad = request.POST.get('cantidad', '1')
+    
+    if request.method == 'POST':
+        if not cliente or not motivo or not cantidad.isdigit() or int(cantidad) < 1:
+            messages.error(request, '❌ Indica el cliente, el motivo y cuántos vehículos asignar.')
+        else:
+            try:
+                asignaciones = asignador.asignar_lote(
+                    taller_id, cliente, int(cantidad), motivo, usuario=request.user
+                )
+            except asignador.CandidatosInsuficientes as error:
+                messages.error(request, f'❌ {error}')
+            else:
+                matriculas = Vehiculo.objects.filter(
+                    id__in=[asignacion.vehiculo_id for asignacion in asignaciones]
+                ).values_list('matricula', flat=True)
+                messages.success(
+                    request,
+                    f'✅ {len(asignaciones)} vehículo(s) asignado(s) a {cliente}: {", ".join(sorted(matriculas))}'
+                )
+                return HttpResponseRedirect(reverse('admin:vehiculos_asignacion_changelist'))
+    
+    context = {
+        'talleres': talleres,
+        'taller_id': taller_id,
+        'candidatos': asignador.candidatos(taller_id)[:10],
+        'cliente': cliente,
+        'motivo': motivo,
+        'cantidad': cantidad,
+    }
+    
+    return render(request, 'admin/asignar_lote.html', context)
+
+
+@login_required
+def auditoria_admin(request):
+    """
+    Incoherencias entre el estado/kilometraje de los vehículos y sus
+    asignaciones, con un botón para repararlas en bloque.
+    Solo accesible a usuarios staff (admin).
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("No tienes permisos para acceder a esta página")
+    
+    vehiculos = Vehiculo.objects.para_usuario(request.user)
+    
+    if request.method == 'POST':
+        reparados = auditoria.reparar(vehiculos, usuario=request.user)
+        messages.success(
+            request,
+            f'✅ Corregidos {sum(reparados.values())} vehículo(s): '
+            + ', '.join(f'{titulo.lower()}: {reparados[clave]}' for clave, titulo, _ in auditoria.COMPROBACIONES)
+        )
+        return HttpResponseRedirect(reverse('vehiculos:auditoria_admin'))
+    
+    comprobaciones = auditoria.auditar(vehiculos)
+    context = {
+        'comprobaciones': comprobaciones,
+        'total': sum(comprobacion.total for comprobacion in comprobaciones),
+    }
+    
+    return render(request, 'admin/auditoria.html', context)
+
+
 @login_required
 def dashboard(request):
     """Vista principal del dashboard con estadísticas y lista de vehículos"""
     
+    # Solo el taller del usuario (índices que empiezan por taller)
+    flota = Vehiculo.objects.para_usuario(request.user)
+    
     # Contar vehículos por estado
-    total_vehiculos = Vehiculo.objects.count()
-    disponibles = Vehiculo.objects.filter(estado=EstadoVehiculo.DISPONIBLE).count()
-    en_uso = Vehiculo.objects.filter(estado=EstadoVehiculo.EN_USO).count()
+    total_vehiculos = flota.count()
+    disponibles = flota.filter(estado=EstadoVehiculo.DISPONIBLE).count()
+    en_uso = flota.filter(estado=EstadoVehiculo.EN_USO).count()
     
-    # Lista completa de vehículos con su estado
-    vehiculos = Vehiculo.objects.all().order_by('estado', 'matricula')
+    # Lista completa de vehículos con su estado (filas ligeras, ver vehiculos/filas.py)
+    vehiculos = filas.filas_vehiculos(flota.order_by('estado', 'matricula'))
     
     # Asignaciones activas recientes
-    asignaciones_activas = Asignacion.objects.filter(activa=True).select_related('vehiculo')[:5]
+    asignaciones_activas = filas.filas_asignaciones(
+        Asignacion.objects.para_usuario(request.user).filter(activa=True)[:5]
+    )
     
     context = {
         'total_vehiculos': total_vehiculos,
@@ -95,62 +194,124 @@ def dashboard(request):
         'asignaciones_activas': asignaciones_activas,
     }
     
-    return render(request, 'vehiculos/dashboard.html', context)
+    return render(request, 'vehiculos/dashboard.html', context, using=settings.MOTOR_PLANTILLAS)
 
 
 @login_required
+@lectura_replica
 def lista_vehiculos(request):
     """Lista todos los vehículos con filtros"""
     
     estado_filtro = request.GET.get('estado', '')
     
-    vehiculos = Vehiculo.objects.all()
+    vehiculos = Vehiculo.objects.para_usuario(request.user)
     
     if estado_filtro:
         vehiculos = vehiculos.filter(estado=estado_filtro)
     
     context = {
-        'vehiculos': vehiculos,
         'estado_filtro': estado_filtro,
         'estados': EstadoVehiculo.choices,
     }
     
-    return render(request, 'vehiculos/lista_vehiculos.html', context)
+    if settings.LISTADOS_STREAMING:
+        return streaming.listado_en_streaming(
+            request, 'vehiculos/lista_vehiculos.html', 'vehiculos/filas_vehiculos.html',
+            context, 'vehiculos', filas.iterar_vehiculos(vehiculos),
+        )
+    
+    context['vehiculos'] = filas.filas_vehiculos(vehiculos)
+    return render(request, 'vehiculos/lista_vehiculos.html', context, using=settings.MOTOR_PLANTILLAS)
 
 
 @login_required
+@lectura_replica
 def detalle_vehiculo(request, vehiculo_id):
     """Detalle de un vehículo específico"""
     
-    vehiculo = get_object_or_404(Vehiculo, id=vehiculo_id)
+    vehiculo = get_object_or_404(Vehiculo.objects.para_usuario(request.user), id=vehiculo_id)
     asignaciones = vehiculo.asignaciones.all()[:10]
+    # Usa el índice (vehiculo, -fecha) del historial
+    cambios_estado = vehiculo.cambios_estado.select_related('usuario')[:10]
     
     context = {
         'vehiculo': vehiculo,
         'asignaciones': asignaciones,
+        'cambios_estado': cambios_estado,
     }
     
     return render(request, 'vehiculos/detalle_vehiculo.html', context)
 
 
 @login_required
+@lectura_replica
 def lista_asignaciones(request):
     """Lista de asignaciones con filtro de activas/finalizadas"""
     
     filtro = request.GET.get('filtro', 'activas')
     
+    asignaciones = Asignacion.objects.para_usuario(request.user)
     if filtro == 'activas':
-        asignaciones = Asignacion.objects.filter(activa=True)
+        asignaciones = asignaciones.filter(activa=True)
     elif filtro == 'finalizadas':
-        asignaciones = Asignacion.objects.filter(activa=False)
-    else:
-        asignaciones = Asignacion.objects.all()
-    
-    asignaciones = asignaciones.select_related('vehiculo')
+        asignaciones = asignaciones.filter(activa=False)
     
     context = {
-        'asignaciones': asignaciones,
         'filtro': filtro,
     }
     
-    return render(request, 'vehiculos/lista_asignaciones.html', context)
+    if settings.LISTADOS_STREAMING:
+        return streaming.listado_en_streaming(
+            request, 'vehiculos/lista_asignaciones.html', 'vehiculos/filas_asignaciones.html',
+            context, 'asignaciones', filas.iterar_asignaciones(asignaciones),
+        )
+    
+    context['asignaciones'] = filas.filas_asignaciones(asignaciones)
+    return render(request, 'vehiculos/lista_asignaciones.html', context, using=settings.MOTOR_PLANTILLAS)
+
+
+@login_required
+@lectura_replica
+def sincronizar(request):
+    """
+    Feed incremental para clientes offline: filas cambiadas y borradas desde
+    el cursor recibido, en lotes (ver vehiculos/sincronizacion.py).
+    """
+    try:
+        limite = min(int(request.GET.get('limite', sincronizacion.LIMITE_POR_DEFECTO)), sincronizacion.LIMITE_MAXIMO)
+        datos = sincronizacion.cambios_desde(
+            request.GET.get('cursor'),
+            max(limite, 1),
+            taller_id=taller_de_usuario(request.user),
+        )
+    except (ValueError, sincronizacion.CursorInvalido) as error:
+        return HttpResponseBadRequest(str(error))
+    
+    return JsonResponse(datos)
+
+
+@login_required
+@lectura_replica
+def informe_talleres(request):
+    """Resumen de flota y asignaciones por taller (solo staff)"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden("No tienes permisos para acceder a esta página")
+    
+    talleres = informes.resumen_por_taller(taller_id=taller_de_usuario(request.user))
+    
+    context = {
+        'talleres': talleres,
+        'total_vehiculos': sum(t.vehiculos for t in talleres),
+        'total_asignaciones_activas': sum(t.asignaciones_activas for t in talleres),
+    }
+    
+    return render(request, 'vehiculos/informe_talleres.html', context)
+
+
+@login_required
+def estado_pool(request):
+    """Estadísticas del pool de conexiones de este proceso (DATABASE_POOL), solo staff"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden("No tienes permisos para acceder a esta página")
+    
+    return JsonResponse({'pid': os.getpid(), 'pools': estadisticas_pools()})